@@ -0,0 +1,123 @@
+"""
+Circuit Breaker Module for Autonomous Task Bot
+
+This module tracks the health of an outbound endpoint. After enough
+consecutive failures the breaker opens and calls fail immediately
+instead of waiting on timeouts and backoff; once the reset timeout (or
+the endpoint's Retry-After) has passed, a single probe call is let
+through (half-open) and its outcome closes or reopens the breaker.
+"""
+
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or config.N8N_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or config.N8N_BREAKER_RESET_TIMEOUT
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may go out now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() >= self._open_until:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                # Let exactly one probe through
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self._probing = False
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        """Count a failed call, opening the breaker at the threshold
+
+        A Retry-After from the endpoint opens the breaker right away, for
+        that long instead of the reset timeout.
+        """
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold or retry_after:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    reason = f"Retry-After {retry_after:.0f}s" if retry_after else \
+                        f"{self.consecutive_failures} consecutive failures"
+                    print(f"🔌 Circuit breaker opened ({reason})")
+                self.state = OPEN
+                self._open_until = time.time() + (retry_after or self.reset_timeout)
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe through (0 when closed)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.time())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Breaker state and counters for status endpoints"""
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in": round(retry_in, 1),
+                "times_opened": self.times_opened,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected
+            }
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter: a random delay up to min(cap, base * 2^attempt)"""
+    base = config.N8N_BACKOFF_BASE if base is None else base
+    cap = config.N8N_BACKOFF_CAP if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
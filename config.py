@@ -13,13 +13,78 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 HOST = os.getenv("HOST", "127.0.0.1")
 PORT = int(os.getenv("PORT", "8000"))
+PIPELINES_PATH = os.getenv("PIPELINES_PATH", "./pipelines.json")  # pipeline profile per task type
+STARTUP_PRELOAD = os.getenv("STARTUP_PRELOAD", "True").lower() == "true"  # load memory and agents in the background at startup
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", f"http://{HOST}:{PORT}").rstrip("/")  # how webhooks link back to this API
 
 # Database Settings
 FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "./data/faiss_index")
 MEMORY_PATH = os.getenv("MEMORY_PATH", "./data/memory")
+REPORTS_PATH = os.getenv("REPORTS_PATH", "./data/reports")
+REPORTS_DB_PATH = os.getenv("REPORTS_DB_PATH", os.path.join(REPORTS_PATH, "reports.sqlite"))
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()  # flat, ivf or hnsw
+FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = ~4*sqrt(n), retrained as memory grows
+FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "8"))
+FAISS_IVF_MIN_VECTORS = int(os.getenv("FAISS_IVF_MIN_VECTORS", "10000"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+FAISS_FILTER_EXACT_MAX = int(os.getenv("FAISS_FILTER_EXACT_MAX", "2048"))  # filtered sets up to this size are scored exactly
+FAISS_FLUSH_INTERVAL = float(os.getenv("FAISS_FLUSH_INTERVAL", "30"))
+FAISS_FLUSH_THRESHOLD = int(os.getenv("FAISS_FLUSH_THRESHOLD", "50"))
+MEMORY_COMPACT_EVERY = int(os.getenv("MEMORY_COMPACT_EVERY", "1000"))
+MEMORY_LOG_FSYNC = os.getenv("MEMORY_LOG_FSYNC", "False").lower() == "true"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto").lower()  # auto, openai or hashing (local, offline)
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "512"))  # hashing backend only
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "100"))
+
+# Task Queue Settings
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+TASK_QUEUE_SIZE = int(os.getenv("TASK_QUEUE_SIZE", "20"))
+TASK_HISTORY_LIMIT = int(os.getenv("TASK_HISTORY_LIMIT", "1000"))
+TASK_DB_PATH = os.getenv("TASK_DB_PATH", "./data/tasks.sqlite")
+TASK_RECENT_LIMIT = int(os.getenv("TASK_RECENT_LIMIT", "100"))  # task records kept in memory for recent-N lookups
+SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "0.5"))
+
+# Crew Worker Pool Settings ("process" uses one CPU core per worker, "thread" stays in-process)
+CREW_EXECUTOR = os.getenv("CREW_EXECUTOR", "process").lower()
+CREW_WORKERS = int(os.getenv("CREW_WORKERS", str(TASK_WORKERS)))
+
+# Result Cache Settings
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "86400"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+RESULT_CACHE_SEMANTIC = os.getenv("RESULT_CACHE_SEMANTIC", "False").lower() == "true"
+RESULT_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("RESULT_CACHE_SEMANTIC_THRESHOLD", "0.965"))  # cosine similarity
+STAGE_CACHE_ENABLED = os.getenv("STAGE_CACHE_ENABLED", "True").lower() == "true"
+STAGE_CACHE_TTL = float(os.getenv("STAGE_CACHE_TTL", "604800"))  # seconds a cached stage output stays valid
+STAGE_CACHE_MAX_ENTRIES = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "5000"))
 
 # n8n Integration
 N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL")
+N8N_QUEUE_SIZE = int(os.getenv("N8N_QUEUE_SIZE", "1000"))  # pending events buffered before the oldest is dropped
+N8N_MAX_RETRIES = int(os.getenv("N8N_MAX_RETRIES", "3"))
+N8N_TIMEOUT = float(os.getenv("N8N_TIMEOUT", "10"))
+N8N_POOL_SIZE = int(os.getenv("N8N_POOL_SIZE", "4"))  # keep-alive connections per host
+N8N_OUTBOX_ENABLED = os.getenv("N8N_OUTBOX_ENABLED", "True").lower() == "true"
+N8N_OUTBOX_PATH = os.getenv("N8N_OUTBOX_PATH", "./data/outbox")
+N8N_OUTBOX_COMPACT_EVERY = int(os.getenv("N8N_OUTBOX_COMPACT_EVERY", "1000"))
+N8N_OUTBOX_FSYNC = os.getenv("N8N_OUTBOX_FSYNC", "False").lower() == "true"
+N8N_BATCH_EVENT_TYPES = [t.strip() for t in os.getenv("N8N_BATCH_EVENT_TYPES", "agent_progress,memory_update").split(",") if t.strip()]
+N8N_BATCH_SIZE = int(os.getenv("N8N_BATCH_SIZE", "20"))  # events per batched POST
+N8N_BATCH_INTERVAL_MS = float(os.getenv("N8N_BATCH_INTERVAL_MS", "500"))  # longest wait to fill a batch
+N8N_COALESCE_EVENT_TYPES = [t.strip() for t in os.getenv("N8N_COALESCE_EVENT_TYPES", "agent_progress").split(",") if t.strip()]
+N8N_REDELIVERY_INTERVAL = float(os.getenv("N8N_REDELIVERY_INTERVAL", "60"))  # seconds before an undelivered event is retried
+N8N_BREAKER_FAILURES = int(os.getenv("N8N_BREAKER_FAILURES", "5"))  # consecutive failures before the circuit opens
+N8N_BREAKER_RESET_TIMEOUT = float(os.getenv("N8N_BREAKER_RESET_TIMEOUT", "30"))  # seconds open before a probe is let through
+N8N_BACKOFF_BASE = float(os.getenv("N8N_BACKOFF_BASE", "1"))  # first retry waits up to this many seconds
+N8N_BACKOFF_CAP = float(os.getenv("N8N_BACKOFF_CAP", "30"))  # longest retry wait
+N8N_RESULT_INLINE_MAX = int(os.getenv("N8N_RESULT_INLINE_MAX", "8192"))  # larger results are sent as a summary plus report URL
+N8N_RESULT_SUMMARY_CHARS = int(os.getenv("N8N_RESULT_SUMMARY_CHARS", "1000"))
+N8N_GZIP = os.getenv("N8N_GZIP", "True").lower() == "true"
+N8N_GZIP_MIN_BYTES = int(os.getenv("N8N_GZIP_MIN_BYTES", "1024"))  # smaller bodies are sent uncompressed
 
 # Check if required API key is set
 if not OPENAI_API_KEY:
@@ -30,4 +95,4 @@ if not OPENAI_API_KEY:
 # Create data directories if they don't exist
 os.makedirs("./data", exist_ok=True)
 os.makedirs("./data/memory", exist_ok=True)
-os.makedirs("./data/reports", exist_ok=True) 
\ No newline at end of file
+os.makedirs(REPORTS_PATH, exist_ok=True) 
\ No newline at end of file
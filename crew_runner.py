@@ -1,16 +1,51 @@
 import uuid
 import json
-import requests
 from datetime import datetime
-from typing import Dict, Any, List
-from crewai import Crew, Task
-from agents import researcher, planner, executor, reporter, bi_analyst, qa_specialist
-from memory_manager import MemoryManager
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from pipeline import (
+    STAGES_BY_NAME, get_pipeline, execution_levels, final_stages, critical_path,
+    kickoff_stage, format_upstream, load_agents, bind_description, pipeline_agents
+)
+from worker_pool import crew_pool
+from result_cache import result_cache, normalize_prompt
+from stage_cache import stage_cache
+from report_store import report_store
+from task_store import task_store
+from n8n_integration import n8n, offload_result
+from webhook_delivery import webhook_delivery
+from startup import startup
 import config
 import time
 
-# Initialize memory manager
-memory_manager = MemoryManager()
+def _load_memory_manager():
+    """Build the memory manager, loading the task log and the FAISS index"""
+    memory = startup.components["memory"]
+    memory_module = memory.timed_import("memory_manager")
+    memory.timed_import("faiss")
+    memory.timed_import("langchain_community.vectorstores.faiss")
+    manager = memory_module.MemoryManager()
+    
+    # Backfill task history from memory records written before the task store existed.
+    # Gated on a stored marker rather than an empty table: a task may already have
+    # been recorded by the time memory is first loaded.
+    if not task_store.is_backfilled():
+        task_store.import_records(manager.memory_log.records)
+    return manager
+
+def _load_agents():
+    """Start the crew workers, each importing CrewAI and building the agents"""
+    agents = startup.components["agents"]
+    agents.imports.update(crew_pool.warm_up(load_agents)[0])
+    return True
+
+# Heavy subsystems are built on first use, or by the startup preloader
+memory_component = startup.register("memory", _load_memory_manager)
+agents_component = startup.register("agents", _load_agents)
+
+def get_memory_manager():
+    """Get the shared memory manager, loading it on first use"""
+    return memory_component.get()
 
 def send_to_n8n(task_id: str, result: str, task_type: str = "general", status: str = "completed", error: str = None):
     """Send task results to n8n webhook with enhanced functionality"""
@@ -22,14 +57,14 @@ def send_to_n8n(task_id: str, result: str, task_type: str = "general", status: s
         # Enhanced payload with more detailed information
         payload = {
             "task_id": task_id,
-            "result": result,
+            **offload_result(task_id, result),
             "task_type": task_type,
             "status": status,
             "timestamp": datetime.now().isoformat(),
             "source": "autonomous-task-bot",
             "version": "1.0.0",
             "metadata": {
-                "agents_used": ["researcher", "planner", "executor", "bi_analyst", "qa_specialist", "reporter"],
+                "agents_used": pipeline_agents(task_type),
                 "memory_enabled": True,
                 "report_saved": True
             }
@@ -40,34 +75,8 @@ def send_to_n8n(task_id: str, result: str, task_type: str = "general", status: s
             payload["error"] = error
             payload["status"] = "failed"
         
-        # Retry logic for better reliability
-        max_retries = 3
-        retry_delay = 1
-        
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    config.N8N_WEBHOOK_URL, 
-                    json=payload,
-                    timeout=10,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Task results sent to n8n successfully (attempt {attempt + 1})")
-                    return True
-                else:
-                    print(f"⚠️ Failed to send to n8n: {response.status_code} - {response.text}")
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Network error sending to n8n (attempt {attempt + 1}): {e}")
-                
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-                
-        print(f"❌ Failed to send to n8n after {max_retries} attempts")
-        return False
+        # Delivered with retries by the background sender, off the task's critical path
+        return webhook_delivery.enqueue(config.N8N_WEBHOOK_URL, payload, description="Task results")
             
     except Exception as e:
         print(f"❌ Error sending to n8n: {e}")
@@ -89,148 +98,233 @@ def send_task_start_to_n8n(task_id: str, prompt: str, task_type: str = "general"
             "event_type": "task_started"
         }
         
-        response = requests.post(
-            config.N8N_WEBHOOK_URL, 
-            json=payload,
-            timeout=5,
-            headers={"Content-Type": "application/json"}
-        )
-        
-        if response.status_code == 200:
-            print(f"✅ Task start notification sent to n8n")
-        else:
-            print(f"⚠️ Failed to send task start to n8n: {response.status_code}")
+        webhook_delivery.enqueue(config.N8N_WEBHOOK_URL, payload, timeout=5,
+                                 description="Task start notification")
             
     except Exception as e:
         print(f"⚠️ Error sending task start to n8n: {e}")
 
-def save_report(task_id: str, result: str, task_type: str = "general"):
-    """Save report to disk"""
+def save_report(task_id: str, result: str, task_type: str = "general", prompt: Optional[str] = None):
+    """Save report to the report store"""
+    try:
+        report_store.save(task_id, result, task_type, prompt=prompt)
+        print(f"✅ Report saved: {task_id}")
+        
+    except Exception as e:
+        print(f"⚠️ Error saving report: {e}")
+
+def find_similar_tasks(prompt: str, k: int = 3) -> List[Dict]:
+    """Find earlier tasks similar to a prompt, for the agents' memory context
+    
+    Earlier runs of the same prompt are skipped: they only repeat the prompt,
+    and would change the context (and so the stage cache keys) every time
+    the prompt is resubmitted.
+    """
+    normalized = normalize_prompt(prompt)
+    # Over-fetch so resubmissions of this prompt don't crowd out other tasks
+    candidates = get_memory_manager().search_similar_tasks(prompt, k=k * 4)
+    return [task for task in candidates if normalize_prompt(task['content']) != normalized][:k]
+
+def context_signature(similar_tasks: List[Dict]) -> str:
+    """Stable identity of a memory context: the sorted IDs of the tasks it lists"""
+    return ",".join(sorted(str(task['metadata'].get('task_id', '')) for task in similar_tasks))
+
+def emit_event(on_event: Optional[Callable[[Dict[str, Any]], None]], event_type: str, **data):
+    """Deliver a progress event to the caller's listener, if any"""
+    if not on_event:
+        return
     try:
-        report_data = {
+        on_event({"event": event_type, "timestamp": datetime.now().isoformat(), **data})
+    except Exception as e:
+        print(f"⚠️ Error delivering progress event: {e}")
+
+def run_stages(task_id: str, prompt: str, task_type: str, context: str,
+               on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+               completed: Optional[Dict[str, str]] = None,
+               force_refresh: bool = False, context_key: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Run the task type's stage DAG on the worker pool, reporting progress
+    
+    Stages are submitted as soon as all of their dependencies have finished,
+    so independent stages run concurrently. A stage whose agent, description
+    and upstream outputs match a cached run reuses that output without
+    calling the LLM. The memory context enters the cache key as context_key
+    (see context_signature) when given, so a reordered context listing the
+    same tasks doesn't cause misses. With force_refresh every stage runs and
+    its fresh output replaces the cached one.
+    
+    Stages in completed (checkpointed outputs of an earlier attempt) are not
+    run again. Every finished stage is checkpointed; when a stage fails no
+    new stages start, but stages already running finish and are checkpointed
+    before the error is raised. Returns the final stage's output and a
+    schedule report showing which stages overlapped.
+    """
+    completed = completed or {}
+    dag = get_pipeline(task_type)
+    order = [stage for level in execution_levels(dag) for stage in level]
+    total_steps = len(order)
+    outputs: Dict[str, str] = {}
+    timings: Dict[str, Dict[str, float]] = {}
+    running: Dict[Future, str] = {}
+    cache_keys: Dict[str, Dict[str, str]] = {}
+    cached: List[str] = []
+    resumed: List[str] = []
+    pipeline_started = time.time()
+    
+    def stage_info(name: str) -> Dict[str, Any]:
+        return {
             "task_id": task_id,
-            "task_type": task_type,
-            "timestamp": datetime.now().isoformat(),
-            "result": result
+            "stage": name,
+            "agent": STAGES_BY_NAME[name]["agent"],
+            "step": order.index(name) + 1,
+            "total_steps": total_steps
         }
+    
+    def finish_stage(name: str, output: str, source: str = "crew"):
+        outputs[name] = output
+        timings[name]["finished"] = time.time()
+        duration = timings[name]["finished"] - timings[name]["started"]
+        if source != "checkpoint":
+            task_store.save_checkpoint(task_id, name, output)
         
-        report_file = f"./data/reports/{task_id}.json"
-        with open(report_file, 'w') as f:
-            json.dump(report_data, f, indent=2)
+        info = stage_info(name)
+        emit_event(on_event, "stage_finished", duration=duration, output=output,
+                   cached=source == "cache", resumed=source == "checkpoint", **info)
+        if n8n.is_configured():
+            n8n.send_agent_progress(task_id, info["agent"], "finished", info["step"], total_steps)
+        note = f" ({source})" if source != "crew" else ""
+        print(f"✅ Stage {name} finished in {duration:.1f}s{note} ({len(outputs)}/{total_steps})")
+    
+    def submit_ready():
+        # Stages are visited in dependency order, so a cache hit can unblock later stages in the same pass
+        for name in order:
+            if name in timings or not all(dep in outputs for dep in dag[name]):
+                continue
+            info = stage_info(name)
+            emit_event(on_event, "stage_started", **info)
+            if n8n.is_configured():
+                n8n.send_agent_progress(task_id, info["agent"], "started", info["step"], total_steps)
             
-        print(f"✅ Report saved: {report_file}")
-        
+            timings[name] = {"started": time.time()}
+            if name in completed:
+                resumed.append(name)
+                finish_stage(name, completed[name], source="checkpoint")
+                continue
+            
+            upstream = format_upstream({dep: outputs[dep] for dep in dag[name]})
+            if config.STAGE_CACHE_ENABLED:
+                cache_context = context if context_key is None else f"similar tasks: {context_key}"
+                description = bind_description(name, prompt, cache_context)
+                cache_keys[name] = stage_cache.make_key(info["agent"], description, upstream)
+                output = None if force_refresh else stage_cache.get(name, cache_keys[name])
+                if output is not None:
+                    cached.append(name)
+                    finish_stage(name, output, source="cache")
+                    continue
+            future = crew_pool.submit(kickoff_stage, name, prompt, task_type, context, upstream)
+            running[future] = name
+    
+    def fail(error: Exception) -> Exception:
+        # Don't start stages whose inputs will never arrive, but let the ones
+        # already running finish so their outputs are checkpointed for a resume
+        for future in list(running):
+            if future.cancel():
+                del running[future]
+        if running:
+            print(f"⏳ Stage failed, waiting for {len(running)} running stages to checkpoint")
+        return failure or error
+
+    failure: Optional[Exception] = None
+    try:
+        submit_ready()
     except Exception as e:
-        print(f"⚠️ Error saving report: {e}")
+        failure = fail(e)
+    while running:
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                output = future.result()
+            except Exception as e:
+                failure = fail(e)
+                continue
+            if name in cache_keys:
+                stage_cache.put(name, cache_keys[name], output)
+            finish_stage(name, output)
+        if failure is None:
+            try:
+                submit_ready()
+            except Exception as e:
+                failure = fail(e)
+    if failure is not None:
+        raise failure
 
-def run_task(prompt: str, task_type: str = "general") -> Dict[str, Any]:
-    """Run a comprehensive task with multiple agents"""
-    task_id = str(uuid.uuid4())
+    schedule = build_schedule_report(dag, timings, pipeline_started)
+    schedule["cached_stages"] = cached
+    schedule["resumed_stages"] = resumed
+    emit_event(on_event, "pipeline_finished", task_id=task_id, **schedule)
+    
+    return outputs[final_stages(dag)[0]], schedule
+
+def build_schedule_report(dag: Dict[str, List[str]], timings: Dict[str, Dict[str, float]],
+                          pipeline_started: float) -> Dict[str, Any]:
+    """Summarize stage timings, overlaps and the critical path of a run"""
+    durations = {name: t["finished"] - t["started"] for name, t in timings.items()}
+    stages = {}
+    for name, t in timings.items():
+        stages[name] = {
+            "depends_on": dag[name],
+            "started_at": round(t["started"] - pipeline_started, 3),
+            "duration": round(durations[name], 3),
+            "parallel_with": [
+                other for other, o in timings.items()
+                if other != name and o["started"] < t["finished"] and t["started"] < o["finished"]
+            ]
+        }
+    
+    total_duration = max(t["finished"] for t in timings.values()) - pipeline_started
+    return {
+        "levels": execution_levels(dag),
+        "stages": stages,
+        "critical_path": critical_path(dag, durations),
+        "total_duration": round(total_duration, 3),
+        "sequential_duration": round(sum(durations.values()), 3)
+    }
+
+def run_task(prompt: str, task_type: str = "general", task_id: Optional[str] = None,
+             on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+             resume: bool = False, force_refresh: bool = False) -> Dict[str, Any]:
+    """Run a comprehensive task with multiple agents
+    
+    If on_event is given it is called with stage_started/stage_finished
+    progress events as each agent stage runs, and a pipeline_finished
+    event with the schedule report. With resume, stages checkpointed by an
+    earlier failed run of the same task_id are reused instead of rerun.
+    With force_refresh no stage output is taken from the stage cache.
+    """
+    task_id = task_id or str(uuid.uuid4())
     
     try:
-        print(f"🚀 Starting task {task_id}: {prompt}")
+        completed = task_store.checkpoints(task_id) if resume else {}
+        if resume:
+            print(f"♻️ Resuming task {task_id} with {len(completed)} completed stages: {prompt}")
+        else:
+            print(f"🚀 Starting task {task_id}: {prompt}")
+        task_store.start(task_id, prompt, task_type)
         
         # Send task start notification to n8n
         send_task_start_to_n8n(task_id, prompt, task_type)
         
         # Search for similar tasks in memory
-        similar_tasks = memory_manager.search_similar_tasks(prompt, k=3)
+        similar_tasks = find_similar_tasks(prompt, k=3)
         context = ""
         if similar_tasks:
             context = f"\n\nPrevious similar tasks:\n"
             for task in similar_tasks:
                 context += f"- {task['content']}\n"
         
-        # Create enhanced tasks for each agent
-        research_task = Task(
-            description=f"""Research the following topic thoroughly: {prompt}
-            
-            {context}
-            
-            Focus on:
-            - Finding authoritative and recent sources
-            - Cross-referencing information for accuracy
-            - Identifying key trends and patterns
-            - Gathering quantitative and qualitative data
-            - Organizing findings in a structured manner""",
-            expected_output="Comprehensive research findings with sources and key insights",
-            agent=researcher
-        )
-        
-        plan_task = Task(
-            description="""Based on the research findings, create a detailed action plan. 
-            
-            Focus on:
-            - Breaking down complex tasks into sequential steps
-            - Identifying dependencies and critical path
-            - Setting realistic timelines and milestones
-            - Defining clear deliverables and success criteria
-            - Anticipating potential challenges and mitigation strategies""",
-            expected_output="Detailed action plan with timeline, milestones, and deliverables",
-            agent=planner
-        )
-        
-        execute_task = Task(
-            description="""Execute the planned tasks with high quality and attention to detail.
-            
-            Focus on:
-            - Following the established plan while remaining flexible
-            - Maintaining high standards of quality and accuracy
-            - Documenting progress and any deviations from plan
-            - Identifying and resolving issues proactively
-            - Ensuring deliverables meet or exceed expectations""",
-            expected_output="Completed deliverables with documentation of execution process",
-            agent=executor
-        )
-        
-        bi_analysis_task = Task(
-            description="""Analyze the research and execution results for business intelligence insights.
-            
-            Focus on:
-            - Identifying key performance indicators and trends
-            - Analyzing competitive landscape and market positioning
-            - Providing actionable business recommendations
-            - Creating data visualizations and dashboards
-            - Forecasting potential outcomes and scenarios""",
-            expected_output="Business intelligence analysis with strategic insights and recommendations",
-            agent=bi_analyst
-        )
-        
-        qa_task = Task(
-            description="""Review and validate all deliverables for quality, accuracy, and completeness.
-            
-            Focus on:
-            - Checking accuracy and completeness of information
-            - Validating sources and cross-referencing data
-            - Ensuring logical flow and coherence
-            - Identifying potential errors or inconsistencies
-            - Providing feedback for improvements""",
-            expected_output="Quality assurance report with validation results and improvement suggestions",
-            agent=qa_specialist
-        )
-        
-        report_task = Task(
-            description="""Compile a comprehensive final report synthesizing all findings and results.
-            
-            Focus on:
-            - Synthesizing information from all sources into coherent narratives
-            - Structuring reports with clear sections and logical flow
-            - Highlighting key insights and actionable recommendations
-            - Using appropriate formatting and visual elements
-            - Ensuring reports are accessible to target audiences""",
-            expected_output="Comprehensive final report with executive summary, findings, and recommendations",
-            agent=reporter
-        )
-        
-        # Create crew with enhanced task sequence
-        crew = Crew(
-            agents=[researcher, planner, executor, bi_analyst, qa_specialist, reporter],
-            tasks=[research_task, plan_task, execute_task, bi_analysis_task, qa_task, report_task],
-            verbose=True
-        )
-        
-        # Run the crew with the prompt as input
-        result = crew.kickoff({"task": prompt, "task_type": task_type})
+        # Run the agent stages on the worker pool
+        result, schedule = run_stages(task_id, prompt, task_type, context, on_event, completed, force_refresh,
+                                      context_signature(similar_tasks))
         
         # Process results
         task_data = {
@@ -241,10 +335,17 @@ def run_task(prompt: str, task_type: str = "general") -> Dict[str, Any]:
         }
         
         # Add to memory
-        memory_manager.add_task_memory(task_id, task_data)
+        get_memory_manager().add_task_memory(task_id, task_data)
         
         # Save report
-        save_report(task_id, str(result), task_type)
+        save_report(task_id, str(result), task_type, prompt)
+        
+        # Cache the result for repeated prompts
+        if config.RESULT_CACHE_ENABLED:
+            result_cache.put(prompt, task_type, task_id, str(result), task_data["timestamp"])
+        
+        task_store.finish(task_id, "completed")
+        task_store.clear_checkpoints(task_id)
         
         # Send to n8n if configured
         send_to_n8n(task_id, str(result), task_type, "completed")
@@ -254,12 +355,14 @@ def run_task(prompt: str, task_type: str = "general") -> Dict[str, Any]:
             "status": "completed",
             "result": str(result),
             "task_type": task_type,
+            "schedule": schedule,
             "timestamp": datetime.now().isoformat()
         }
         
     except Exception as e:
         error_msg = f"Error: {str(e)}"
         print(f"❌ Task failed: {error_msg}")
+        task_store.finish(task_id, "failed", error_msg)
         
         # Send failure notification to n8n
         send_to_n8n(task_id, "", task_type, "failed", error_msg)
@@ -272,10 +375,67 @@ def run_task(prompt: str, task_type: str = "general") -> Dict[str, Any]:
             "timestamp": datetime.now().isoformat()
         }
 
+def get_cached_result(prompt: str, task_type: str = "general") -> Optional[Dict[str, Any]]:
+    """Get a cached result for a prompt, shaped like a completed run_task result"""
+    if not config.RESULT_CACHE_ENABLED:
+        return None
+    
+    # Semantic lookups wait for the memory store rather than holding the request while it loads
+    memory_manager = memory_component.peek()
+    search = memory_manager.search_similar_tasks if memory_manager else None
+    entry = result_cache.get(prompt, task_type, search=search)
+    if not entry:
+        return None
+    
+    print(f"⚡ Cache hit ({entry['cache_match']}) for task {entry['task_id']}")
+    return {**entry, "status": "completed", "cache_hit": True}
+
+def get_report(task_id: str) -> Optional[Dict[str, Any]]:
+    """Get a stored task report"""
+    return report_store.get(task_id)
+
+def list_reports(limit: int = 20, cursor: Optional[str] = None, **filters) -> Dict[str, Any]:
+    """List stored reports newest first, one page at a time"""
+    reports, next_cursor = report_store.list(limit, cursor, **filters)
+    return {"reports": reports, "count": len(reports), "next_cursor": next_cursor}
+
 def get_task_history(limit: int = 10) -> List[Dict]:
-    """Get recent task history"""
-    return memory_manager.get_task_history(limit)
+    """Get the most recent task records, newest first"""
+    return task_store.recent(limit)
+
+def get_task_record(task_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+    """Get a task's stored record, with the stages it has checkpointed
+    
+    With include_result, a completed task's result is added from its report.
+    """
+    record = task_store.get(task_id)
+    if record:
+        record["completed_stages"] = list(task_store.checkpoints(task_id))
+        if include_result and record["status"] == "completed":
+            report = report_store.get(task_id)
+            if report:
+                record["result"] = report["result"]
+    return record
+
+def list_tasks(limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Page through task records newest first"""
+    tasks, next_cursor = task_store.list(limit, cursor)
+    return {"tasks": tasks, "count": len(tasks), "next_cursor": next_cursor}
+
+def search_tasks(query: str, k: int = 5, mode: str = "vector", **filters) -> List[Dict]:
+    """Search for similar tasks, optionally filtered by task_type, task_id, since and until"""
+    return get_memory_manager().search_tasks([query], k, mode, **filters)[0]
+
+def search_tasks_batch(queries: List[str], k: int = 5, mode: str = "vector", **filters) -> List[List[Dict]]:
+    """Search for similar tasks for several queries at once"""
+    return get_memory_manager().search_tasks(queries, k, mode, **filters)
+
+def shutdown_memory():
+    """Flush memory to disk on shutdown, if it was ever loaded"""
+    memory_manager = memory_component.peek()
+    if memory_manager:
+        memory_manager.close()
 
-def search_tasks(query: str, k: int = 5) -> List[Dict]:
-    """Search for similar tasks"""
-    return memory_manager.search_similar_tasks(query, k)
+def get_memory_stats() -> Dict[str, Any]:
+    """Get memory system statistics"""
+    return get_memory_manager().get_stats()
@@ -0,0 +1,116 @@
+"""
+Embedding Backends Module for Autonomous Task Bot
+
+This module selects the embeddings model behind the memory vector store.
+Backends:
+
+- openai: OpenAI embeddings over the network (needs OPENAI_API_KEY),
+  wrapped in the persistent embedding cache
+- hashing: local NumPy feature hashing of words, word pairs and character
+  trigrams; no network, no model download, microseconds per text
+- auto: openai when a key is configured, hashing otherwise
+
+Each backend has a signature stored next to the FAISS index, so switching
+backends (or dimensions) is detected and the index rebuilt.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from keyword_index import tokenize
+import config
+
+BACKENDS = ("auto", "openai", "hashing")
+
+@lru_cache(maxsize=200000)
+def _hash_feature(feature: str) -> int:
+    """Stable 64-bit hash of a feature (Python's hash() changes per process)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+class HashingEmbeddings(Embeddings):
+    """Signed feature-hashing embeddings computed locally with NumPy"""
+
+    def __init__(self, dimension: Optional[int] = None):
+        self.dimension = dimension or config.EMBEDDING_DIMENSION
+        self.model = f"hashing-{self.dimension}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts into one matrix"""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                hashed = _hash_feature(feature)
+                rows.append(row)
+                columns.append(hashed % self.dimension)
+                # The top bit picks the sign so colliding features tend to cancel out
+                values.append((1.0 + np.log(count)) * (1.0 if hashed >> 63 else -1.0))
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)),
+                  np.array(values, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+        return matrix.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text"""
+        return self.embed_documents([text])[0]
+
+    def _features(self, text: str) -> Dict[str, int]:
+        """Count word, word-pair and character-trigram features"""
+        words = tokenize(text)
+        features: Dict[str, int] = {}
+        for word in words:
+            features[f"w:{word}"] = features.get(f"w:{word}", 0) + 1
+            padded = f"<{word}>"
+            for start in range(len(padded) - 2):
+                trigram = f"c:{padded[start:start + 3]}"
+                features[trigram] = features.get(trigram, 0) + 1
+        for first, second in zip(words, words[1:]):
+            features[f"b:{first} {second}"] = features.get(f"b:{first} {second}", 0) + 1
+        return features
+
+def resolve_backend() -> str:
+    """Pick the configured backend, resolving auto from the available credentials"""
+    backend = config.EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {BACKENDS})")
+    if backend == "auto":
+        has_key = config.OPENAI_API_KEY and config.OPENAI_API_KEY != "your_openai_api_key_here"
+        return "openai" if has_key else "hashing"
+    return backend
+
+def create_embeddings() -> Optional[Embeddings]:
+    """Build the configured embeddings model, or None if it can't be used"""
+    backend = resolve_backend()
+    if backend == "hashing":
+        return HashingEmbeddings()
+
+    if not config.OPENAI_API_KEY or config.OPENAI_API_KEY == "your_openai_api_key_here":
+        print("⚠️ OpenAI API key not configured, FAISS will be disabled")
+        return None
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(openai_api_key=config.OPENAI_API_KEY)
+    if config.EMBEDDING_CACHE_ENABLED:
+        from embedding_cache import CachedEmbeddings
+        embeddings = CachedEmbeddings(embeddings)
+    return embeddings
+
+def embedding_signature(embeddings: Embeddings) -> Dict[str, Any]:
+    """Describe an embeddings model so a stored index can be checked against it"""
+    model = getattr(embeddings, "embeddings", embeddings)
+    if isinstance(model, HashingEmbeddings):
+        return {"backend": "hashing", "model": model.model, "dimension": model.dimension}
+    return {"backend": "openai", "model": getattr(model, "model", None), "dimension": None}
+
+def signature_matches(stored: Optional[Dict[str, Any]], current: Dict[str, Any], index_dimension: int) -> bool:
+    """Check whether an index built with the stored signature can serve the current model
+
+    Indexes saved before signatures were recorded were always built with OpenAI.
+    """
+    stored = stored or {"backend": "openai", "model": current["model"] if current["backend"] == "openai" else None}
+    if stored.get("backend") != current["backend"] or stored.get("model") != current["model"]:
+        return False
+    return current["dimension"] is None or current["dimension"] == index_dimension
@@ -0,0 +1,138 @@
+"""
+Embedding Cache Module for Autonomous Task Bot
+
+This module wraps an embeddings model with a persistent SQLite cache
+mapping a content hash to its vector, so repeated texts are embedded
+once and later lookups cost no network calls.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlite_cache import evict_lru
+import config
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper backed by a size-bounded on-disk vector cache"""
+
+    def __init__(self, embeddings: Embeddings, cache_path: Optional[str] = None,
+                 max_entries: Optional[int] = None):
+        self.embeddings = embeddings
+        self.namespace = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.cache_path = cache_path or os.path.join(config.MEMORY_PATH, "embedding_cache.sqlite")
+        self.max_entries = max_entries or config.EMBEDDING_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the wrapped model only for cache misses"""
+        keys = [self._make_key(text) for text in texts]
+        cached = self._load(keys)
+
+        # One batched call for the distinct texts that aren't cached
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), vectors))
+            self._store(new_vectors)
+            cached.update({key: list(vector) for key, vector in new_vectors.items()})
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text"""
+        key = self._make_key(text)
+        cached = self._load([key])
+        if key in cached:
+            with self._lock:
+                self.hits += 1
+            return cached[key]
+
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+        with self._lock:
+            self.misses += 1
+        return list(vector)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.cache_path,
+                "namespace": self.namespace,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            self._conn.close()
+
+    def _make_key(self, text: str) -> str:
+        """Hash the text together with the model so models never share vectors"""
+        return hashlib.sha256(f"{self.namespace}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for the given keys and mark them as recently used"""
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        """Persist new vectors and evict the least recently used overflow"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()]
+            )
+            evict_lru(self._conn, "embeddings", self.max_entries)
+            self._conn.commit()
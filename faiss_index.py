@@ -0,0 +1,253 @@
+"""
+FAISS Index Module for Autonomous Task Bot
+
+This module builds and migrates the raw FAISS indexes behind the memory
+vector store. Supported index types:
+
+- flat: exact brute-force search (the LangChain default)
+- ivf: inverted file index, trained on the stored vectors and retrained
+  as the store grows
+- hnsw: graph-based approximate search, no training needed
+
+All types use L2 distance, so similarity scores don't depend on the index
+type, and conversions keep vector positions so docstore mappings stay
+valid.
+
+Metadata filters are pushed down into the search: MetadataIndex maps
+vector positions to task type, task ID and timestamp, and the matching
+positions are handed to FAISS as an ID selector instead of filtering the
+top-k afterwards.
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import faiss
+import config
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+def similarity_from_distance(distance: float) -> float:
+    """Cosine similarity, clamped to 0-1, from a squared L2 distance between unit vectors
+
+    FAISS returns squared L2 distances and both embedding backends produce
+    normalized vectors, so ||a - b||^2 = 2 - 2 cos(a, b).
+    """
+    return min(1.0, max(0.0, 1.0 - distance / 2.0))
+
+def index_type_of(index: faiss.Index) -> str:
+    """Name the type of a FAISS index"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+def ivf_nlist_for(count: int) -> int:
+    """Number of IVF clusters for a store of the given size"""
+    if config.FAISS_IVF_NLIST:
+        return config.FAISS_IVF_NLIST
+    # ~4*sqrt(n) clusters, with at least 39 training points per cluster
+    return max(1, min(int(4 * math.sqrt(count)), count // 39))
+
+def build_index(index_type: str, dim: int, vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    """Build an empty (but trained, if needed) index of the given type
+
+    IVF needs enough vectors to train on; below FAISS_IVF_MIN_VECTORS a flat
+    index is returned instead and the store is upgraded once it grows.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type} (expected one of {INDEX_TYPES})")
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.FAISS_HNSW_M)
+        index.hnsw.efConstruction = config.FAISS_HNSW_EF_CONSTRUCTION
+    elif index_type == "ivf" and vectors is not None and len(vectors) >= config.FAISS_IVF_MIN_VECTORS:
+        nlist = ivf_nlist_for(len(vectors))
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        index.train(vectors)
+        # Keep a direct map so vectors can be reconstructed for later migrations
+        index.make_direct_map()
+    else:
+        index = faiss.IndexFlatL2(dim)
+
+    tune_index(index)
+    return index
+
+def tune_index(index: faiss.Index):
+    """Apply search-time parameters from config"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.FAISS_HNSW_EF_SEARCH
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(config.FAISS_IVF_NPROBE, index.nlist)
+
+def extract_vectors(index: faiss.Index, start: int = 0) -> np.ndarray:
+    """Read the stored vectors back out of an index, in position order"""
+    count = index.ntotal - start
+    if count <= 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(start, count)
+
+def convert_index(index: faiss.Index, index_type: str) -> faiss.Index:
+    """Copy an index's vectors into a new index of the given type"""
+    vectors = extract_vectors(index)
+    new_index = build_index(index_type, index.d, vectors)
+    if len(vectors):
+        new_index.add(vectors)
+    return new_index
+
+def needs_rebuild(index: faiss.Index, index_type: str) -> bool:
+    """Check if an index should be rebuilt to match the configured type
+
+    True when the type differs (and an IVF index would have enough data to
+    train) or when an IVF index has grown enough that its clusters are too
+    coarse and it should be retrained.
+    """
+    current = index_type_of(index)
+    if index_type == "ivf":
+        if current != "ivf":
+            return index.ntotal >= config.FAISS_IVF_MIN_VECTORS
+        if config.FAISS_IVF_NLIST:
+            return False
+        nlist = faiss.try_extract_index_ivf(index).nlist
+        return ivf_nlist_for(index.ntotal) >= 2 * nlist
+    return current != index_type
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """Summarize an index for status endpoints"""
+    info = {"type": index_type_of(index), "vectors": index.ntotal, "dimension": index.d}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        info.update({"nlist": ivf.nlist, "nprobe": ivf.nprobe})
+    hnsw = faiss.downcast_index(index)
+    if isinstance(hnsw, faiss.IndexHNSW):
+        info.update({"M": config.FAISS_HNSW_M, "ef_search": hnsw.hnsw.efSearch})
+    return info
+
+def search_index(index: faiss.Index, queries: np.ndarray, k: int,
+                 allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Search an index, optionally restricted to the given vector positions
+
+    Small filtered sets are scored exactly from their reconstructed vectors,
+    since graph and cluster searches lose recall when most candidates are
+    excluded. Larger sets use an ID selector so FAISS skips excluded vectors
+    while searching. Missing results are padded with position -1.
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    if allowed is None:
+        return index.search(queries, k)
+
+    if len(allowed) <= config.FAISS_FILTER_EXACT_MAX:
+        return _search_exact(index, queries, k, allowed)
+
+    selector = faiss.IDSelectorBatch(allowed.astype(np.int64))
+    base = faiss.downcast_index(index)
+    ivf = faiss.try_extract_index_ivf(index)
+    # Search parameters replace the index's own settings, so carry them over
+    if isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    elif ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=params)
+
+def _search_exact(index: faiss.Index, queries: np.ndarray, k: int,
+                  allowed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Brute-force L2 search over the reconstructed vectors of a few positions"""
+    distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    ids = np.full((len(queries), k), -1, dtype=np.int64)
+    if not len(allowed):
+        return distances, ids
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    vectors = index.reconstruct_batch(allowed.astype(np.int64))
+    subset_distances = faiss.pairwise_distances(queries, vectors)
+    top = min(k, len(allowed))
+    order = np.argsort(subset_distances, axis=1)[:, :top]
+    distances[:, :top] = np.take_along_axis(subset_distances, order, axis=1)
+    ids[:, :top] = allowed[order]
+    return distances, ids
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert an ISO 8601 timestamp to epoch seconds"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).timestamp()
+
+class MetadataIndex:
+    """Side index from vector positions to task metadata
+
+    Keeps a partition of positions per task type and per task ID plus a
+    timestamp column, so a filter resolves to the matching positions
+    without touching the docstore.
+    """
+
+    def __init__(self):
+        self.by_task_type: Dict[str, List[int]] = {}
+        self.by_task_id: Dict[str, List[int]] = {}
+        self.timestamps: List[float] = []
+        self._timestamp_array: Optional[np.ndarray] = None
+
+    def add(self, position: int, metadata: Dict[str, Any]):
+        """Record the metadata of the vector at the given position"""
+        if position != len(self.timestamps):
+            raise ValueError(f"Expected position {len(self.timestamps)}, got {position}")
+        self.by_task_type.setdefault(metadata.get("task_type", "general"), []).append(position)
+        self.by_task_id.setdefault(str(metadata.get("task_id", "")), []).append(position)
+        try:
+            timestamp = parse_timestamp(metadata.get("timestamp"))
+        except (TypeError, ValueError):
+            timestamp = None
+        self.timestamps.append(np.nan if timestamp is None else timestamp)
+        self._timestamp_array = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def select(self, task_type: Optional[str] = None, task_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None) -> Optional[np.ndarray]:
+        """Resolve filters to the sorted positions that match, or None if unfiltered"""
+        if task_type is None and task_id is None and since is None and until is None:
+            return None
+
+        # Start from the narrowest partition
+        candidates: Optional[np.ndarray] = None
+        if task_id is not None:
+            candidates = np.array(self.by_task_id.get(task_id, []), dtype=np.int64)
+        if task_type is not None:
+            partition = np.array(self.by_task_type.get(task_type, []), dtype=np.int64)
+            candidates = partition if candidates is None else np.intersect1d(candidates, partition)
+        if candidates is None:
+            candidates = np.arange(len(self.timestamps), dtype=np.int64)
+
+        start, end = parse_timestamp(since), parse_timestamp(until)
+        if start is not None or end is not None:
+            if self._timestamp_array is None:
+                self._timestamp_array = np.array(self.timestamps, dtype=np.float64)
+            stamps = self._timestamp_array[candidates]
+            # NaN timestamps fail every comparison and drop out
+            keep = np.ones(len(candidates), dtype=bool)
+            if start is not None:
+                keep &= stamps >= start
+            if end is not None:
+                keep &= stamps <= end
+            candidates = candidates[keep]
+
+        return np.sort(candidates)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Partition sizes for status endpoints"""
+        return {
+            "positions": len(self.timestamps),
+            "task_types": {task_type: len(positions) for task_type, positions in self.by_task_type.items()}
+        }
@@ -0,0 +1,158 @@
+"""
+Keyword Index Module for Autonomous Task Bot
+
+This module provides an in-memory BM25 inverted index over stored task
+prompts and results. It needs no embeddings, so search keeps working
+without an OpenAI key, and it matches exact identifiers (ticket numbers,
+company names) that vector search tends to blur. Hybrid search merges
+keyword and vector rankings with reciprocal-rank fusion.
+"""
+
+import re
+import math
+import heapq
+import threading
+from datetime import datetime
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+SEARCH_MODES = ("keyword", "vector", "hybrid")
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal-rank fusion damping; 60 is the usual choice
+RRF_K = 60
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./:#]\w+)*")
+SEPARATOR_PATTERN = re.compile(r"[-./:#]")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; compound identifiers like INC-1234 also yield their parts"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = SEPARATOR_PATTERN.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+def _epoch(timestamp: Optional[str]) -> Optional[float]:
+    """Convert an ISO 8601 timestamp to epoch seconds, or None if missing or invalid"""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp() if timestamp else None
+    except (TypeError, ValueError):
+        return None
+
+class BM25Index:
+    """Incrementally maintained BM25 index over task records"""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        self.timestamps: List[Optional[float]] = []
+        self.total_length = 0
+        self._task_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]):
+        """Index a task record (task_id, prompt, task_type, timestamp, result)"""
+        task_id = record.get("task_id")
+        terms = Counter(tokenize(f"{record.get('prompt', '')}\n{record.get('result', '')}"))
+        with self._lock:
+            if task_id in self._task_ids:
+                return
+            doc = len(self.records)
+            self.records.append(record)
+            self.doc_lengths.append(sum(terms.values()))
+            self.timestamps.append(_epoch(record.get("timestamp")))
+            self.total_length += self.doc_lengths[-1]
+            self._task_ids[task_id] = doc
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[doc] = count
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, query: str, k: int = 5, task_type: Optional[str] = None, task_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """Rank records by BM25 score, skipping those that fail the filters"""
+        start, end = _epoch(since), _epoch(until)
+        with self._lock:
+            count = len(self.records)
+            if not count:
+                return []
+            average_length = self.total_length / count
+
+            if task_id is not None:
+                doc = self._task_ids.get(task_id)
+                allowed = {doc} if doc is not None else set()
+            else:
+                allowed = None
+
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, frequency in postings.items():
+                    if allowed is not None and doc not in allowed:
+                        continue
+                    if not self._matches(doc, task_type, start, end):
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc] / average_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [self._to_result(doc, score) for doc, score in top]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size for status endpoints"""
+        with self._lock:
+            return {"documents": len(self.records), "terms": len(self.postings)}
+
+    def _matches(self, doc: int, task_type: Optional[str], start: Optional[float], end: Optional[float]) -> bool:
+        """Check a record against the type and time filters"""
+        if task_type is not None and self.records[doc].get("task_type", "general") != task_type:
+            return False
+        if start is not None or end is not None:
+            timestamp = self.timestamps[doc]
+            if timestamp is None:
+                return False
+            if start is not None and timestamp < start:
+                return False
+            if end is not None and timestamp > end:
+                return False
+        return True
+
+    def _to_result(self, doc: int, score: float) -> Dict:
+        """Shape a record like a vector search result"""
+        record = self.records[doc]
+        return {
+            'content': record.get('prompt', ''),
+            'metadata': {
+                'task_id': record.get('task_id'),
+                'timestamp': record.get('timestamp'),
+                'task_type': record.get('task_type', 'general'),
+                'result': record.get('result', '')
+            },
+            'score': score
+        }
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict]], k: int) -> List[Dict]:
+    """Merge ranked result lists by summing 1 / (RRF_K + rank) per task
+
+    Each result keeps the content and metadata of its first appearance and
+    gets the fused score plus the per-mode scores it came from.
+    """
+    fused: Dict[str, Dict] = {}
+    for mode, results in rankings.items():
+        for rank, result in enumerate(results, start=1):
+            key = result['metadata'].get('task_id') or result['content']
+            entry = fused.setdefault(key, {**result, 'score': 0.0, 'scores': {}})
+            entry['score'] += 1.0 / (RRF_K + rank)
+            entry['scores'][mode] = result['score']
+    return sorted(fused.values(), key=lambda result: result['score'], reverse=True)[:k]
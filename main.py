@@ -1,15 +1,30 @@
+from startup import startup
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from crew_runner import run_task, get_task_history, search_tasks
+from fastapi.concurrency import run_in_threadpool
+from crew_runner import (
+    get_task_history, list_tasks, get_task_record, search_tasks, search_tasks_batch, get_cached_result,
+    get_report, list_reports, get_memory_stats, shutdown_memory
+)
+from result_cache import result_cache
+from stage_cache import stage_cache
+from keyword_index import SEARCH_MODES
+from pipeline import PIPELINES, DEFAULT_PIPELINE, list_pipelines
+from task_queue import task_queue, get_queue_status, QueueFullError
 from n8n_integration import n8n, get_n8n_status, test_n8n_connection
+from webhook_delivery import webhook_delivery
 import uvicorn
 import os
+import json
+import asyncio
 import config
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+
+startup.mark_imported()
 
 app = FastAPI(
     title="Autonomous Multi-Agent Task Bot",
@@ -31,6 +46,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["pipelines"] = list_pipelines()
 
 @app.get("/", response_class=HTMLResponse)
 def dashboard(request: Request):
@@ -59,14 +75,22 @@ def dashboard(request: Request):
         )
 
 @app.post("/", response_class=HTMLResponse)
-async def process_task(request: Request, task_prompt: str = Form(...), task_type: str = Form("general")):
+async def process_task(request: Request, task_prompt: str = Form(...), task_type: str = Form(DEFAULT_PIPELINE),
+                       force_refresh: bool = Form(False)):
     """Process a task with the multi-agent system"""
     try:
         if not task_prompt.strip():
             raise HTTPException(status_code=400, detail="Task prompt cannot be empty")
+        validate_task_type(task_type)
         
-        # Run the task
-        result = run_task(task_prompt, task_type)
+        result = None
+        if not force_refresh:
+            result = await run_in_threadpool(get_cached_result, task_prompt, task_type)
+        
+        if result is None:
+            # Run the task on a background worker without blocking the event loop
+            job = task_queue.submit(task_prompt, task_type, force_refresh=force_refresh)
+            result = await asyncio.wrap_future(job.future)
         
         # Get updated history
         history = get_task_history(5)
@@ -78,6 +102,7 @@ async def process_task(request: Request, task_prompt: str = Form(...), task_type
                     "request": request, 
                     "result": result["result"],
                     "task_id": result["task_id"],
+                    "cache_hit": result.get("cache_hit", False),
                     "history": history,
                     "timestamp": result["timestamp"]
                 }
@@ -93,6 +118,30 @@ async def process_task(request: Request, task_prompt: str = Form(...), task_type
                 }
             )
             
+    except HTTPException as e:
+        # Invalid input (empty prompt, unknown task type) keeps its status code
+        return templates.TemplateResponse(
+            "dashboard.html", 
+            {
+                "request": request, 
+                "result": f"Error processing task: {e.detail}",
+                "history": get_task_history(5),
+                "timestamp": datetime.now().isoformat()
+            },
+            status_code=e.status_code
+        )
+    except QueueFullError as e:
+        return templates.TemplateResponse(
+            "dashboard.html", 
+            {
+                "request": request, 
+                "result": f"{str(e)}. Please retry in {e.retry_after} seconds.",
+                "history": get_task_history(5),
+                "timestamp": datetime.now().isoformat()
+            },
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "dashboard.html", 
@@ -105,49 +154,304 @@ async def process_task(request: Request, task_prompt: str = Form(...), task_type
         )
 
 @app.get("/api/tasks", response_class=JSONResponse)
-async def get_tasks(limit: int = 10):
-    """Get task history via API"""
+async def get_tasks(limit: int = 10, cursor: Optional[str] = None):
+    """Get task history via API, newest first; pass next_cursor back as cursor for older tasks"""
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
     try:
-        history = get_task_history(limit)
-        return {"tasks": history, "count": len(history)}
+        return await run_in_threadpool(list_tasks, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/search", response_class=JSONResponse)
-async def search_tasks_api(query: str, limit: int = 5):
-    """Search for similar tasks via API"""
+async def search_tasks_api(query: str, limit: int = 5, mode: str = "vector", task_type: Optional[str] = None,
+                           task_id: Optional[str] = None, since: Optional[str] = None,
+                           until: Optional[str] = None):
+    """Search for similar tasks via API, optionally filtered by metadata
+    
+    mode is vector (the default; score is a 0-1 similarity), keyword (BM25)
+    or hybrid (both, fused by rank; score is a reciprocal rank fusion value,
+    not comparable to a similarity threshold). since and until are ISO 8601
+    timestamps bounding the task's timestamp.
+    """
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+    validate_search_mode(mode)
+    validate_time_filters(since, until)
+    
+    filters = {"task_type": task_type, "task_id": task_id, "since": since, "until": until}
     try:
-        if not query.strip():
-            raise HTTPException(status_code=400, detail="Search query cannot be empty")
-        
-        results = search_tasks(query, limit)
-        return {"results": results, "query": query, "count": len(results)}
+        results = await run_in_threadpool(search_tasks, query, limit, mode, **filters)
+        return {
+            "results": results,
+            "query": query,
+            "mode": mode,
+            "filters": {name: value for name, value in filters.items() if value is not None},
+            "count": len(results)
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/tasks", response_class=JSONResponse)
-async def create_task(task_prompt: str, task_type: str = "general"):
-    """Create a new task via API"""
+@app.get("/api/reports", response_class=JSONResponse)
+async def list_reports_api(limit: int = 20, cursor: Optional[str] = None, task_type: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None):
+    """List stored reports newest first; pass next_cursor back as cursor for the next page"""
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    validate_time_filters(since, until)
     try:
-        if not task_prompt.strip():
-            raise HTTPException(status_code=400, detail="Task prompt cannot be empty")
+        return await run_in_threadpool(list_reports, limit, cursor, task_type=task_type,
+                                       since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/reports/{task_id}", response_class=JSONResponse)
+async def get_report_api(task_id: str):
+    """Get the full report of a completed task"""
+    report = await run_in_threadpool(get_report, task_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return report
+
+@app.post("/api/search/batch", response_class=JSONResponse)
+async def search_tasks_batch_api(queries: List[str], limit: int = 5, mode: str = "vector",
+                                 task_type: Optional[str] = None, task_id: Optional[str] = None,
+                                 since: Optional[str] = None, until: Optional[str] = None):
+    """Search for similar tasks for a JSON array of queries in one round-trip
+    
+    All queries are embedded in one call and searched together; the same
+    mode and filters as GET /api/search apply to every query.
+    """
+    if not queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(queries) > config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {config.SEARCH_BATCH_MAX_QUERIES} queries per batch")
+    if any(not query.strip() for query in queries):
+        raise HTTPException(status_code=400, detail="Search queries cannot be empty")
+    validate_search_mode(mode)
+    validate_time_filters(since, until)
+    
+    filters = {"task_type": task_type, "task_id": task_id, "since": since, "until": until}
+    try:
+        batch = await run_in_threadpool(search_tasks_batch, queries, limit, mode, **filters)
+        return {
+            "results": [
+                {"query": query, "results": results, "count": len(results)}
+                for query, results in zip(queries, batch)
+            ],
+            "mode": mode,
+            "filters": {name: value for name, value in filters.items() if value is not None},
+            "count": len(batch)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def validate_search_mode(mode: str):
+    """Reject unknown search modes"""
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid search mode: {mode} (expected one of {', '.join(SEARCH_MODES)})")
+
+def validate_task_type(task_type: str):
+    """Reject task types that have no pipeline profile"""
+    if task_type not in PIPELINES:
+        raise HTTPException(status_code=400, detail=f"Unknown task type: {task_type} (expected one of {', '.join(PIPELINES)})")
+
+def validate_time_filters(since: Optional[str], until: Optional[str]):
+    """Reject since/until values that aren't ISO 8601 timestamps"""
+    for name, value in (("since", since), ("until", until)):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp: {value}")
+
+@app.post("/api/tasks", response_class=JSONResponse, status_code=202)
+async def create_task(task_prompt: str, task_type: str = DEFAULT_PIPELINE, force_refresh: bool = False):
+    """Queue a new task via API and return its ID immediately
+    
+    task_type selects the pipeline profile (see GET /api/pipelines).
+    Repeated prompts are answered from the result cache with status 200 and
+    cache_hit set, unless force_refresh is true, in which case every agent
+    stage runs again instead of reusing cached stage outputs.
+    """
+    if not task_prompt.strip():
+        raise HTTPException(status_code=400, detail="Task prompt cannot be empty")
+    validate_task_type(task_type)
+    
+    try:
+        if not force_refresh:
+            cached = await run_in_threadpool(get_cached_result, task_prompt, task_type)
+            if cached:
+                return JSONResponse(content=cached, status_code=200)
         
-        result = run_task(task_prompt, task_type)
-        return result
+        job = task_queue.submit(task_prompt, task_type, force_refresh=force_refresh)
+        return {
+            **job.to_dict(include_result=False),
+            "status_url": f"/api/tasks/{job.task_id}"
+        }
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/tasks/{task_id}/resume", response_class=JSONResponse, status_code=202)
+async def resume_task(task_id: str):
+    """Rerun a failed task, starting from its first incomplete stage
+    
+    Stages that finished before the failure are taken from their
+    checkpoints instead of being run again.
+    """
+    record = await run_in_threadpool(get_task_record, task_id)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    if record["status"] != "failed":
+        raise HTTPException(status_code=409, detail=f"Only failed tasks can be resumed (task is {record['status']})")
+    validate_task_type(record["task_type"])
+    
+    try:
+        job = task_queue.submit(record["prompt"], record["task_type"], task_id=task_id, resume=True)
+        return {
+            **job.to_dict(include_result=False),
+            "completed_stages": record["completed_stages"],
+            "status_url": f"/api/tasks/{task_id}"
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.get("/api/pipelines", response_class=JSONResponse)
+async def get_pipelines():
+    """List the task types and the agent stages each one runs"""
+    return {"pipelines": list_pipelines(), "default": DEFAULT_PIPELINE}
+
+@app.get("/api/tasks/{task_id}", response_class=JSONResponse)
+async def get_task(task_id: str):
+    """Get status and result of a submitted task
+    
+    Tasks no longer tracked by the queue (evicted, or run before a restart)
+    are answered from the task store.
+    """
+    job = task_queue.get(task_id)
+    if job:
+        return job.to_dict()
+    record = await run_in_threadpool(get_task_record, task_id, True)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    return record
+
+@app.get("/api/tasks/{task_id}/events")
+async def stream_task_events(request: Request, task_id: str):
+    """Stream task progress as Server-Sent Events
+    
+    Emits task lifecycle events and stage_started/stage_finished events for
+    each agent stage. Reconnecting clients resume after Last-Event-ID.
+    """
+    job = task_queue.get(task_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    
+    try:
+        last_event_id = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        last_event_id = -1
+    
+    async def event_stream():
+        cursor = last_event_id
+        idle = 0.0
+        while True:
+            events = job.get_events(cursor)
+            for event in events:
+                cursor = event["id"]
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            
+            # The future resolves only after the final lifecycle event is recorded
+            if job.future.done() and not job.get_events(cursor):
+                break
+            if await request.is_disconnected():
+                break
+            
+            if events:
+                idle = 0.0
+            elif idle >= 15:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            
+            await asyncio.sleep(config.SSE_POLL_INTERVAL)
+            idle += config.SSE_POLL_INTERVAL
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/memory/stats", response_class=JSONResponse)
+async def get_memory_stats_api():
+    """Get memory system and embedding cache statistics"""
+    return await run_in_threadpool(get_memory_stats)
+
+@app.get("/api/cache/status", response_class=JSONResponse)
+async def get_cache_status():
+    """Get result cache and per-stage output cache statistics"""
+    return {
+        "enabled": config.RESULT_CACHE_ENABLED,
+        **result_cache.get_stats(),
+        "stage_cache": {"enabled": config.STAGE_CACHE_ENABLED, **await run_in_threadpool(stage_cache.get_stats)}
+    }
+
+@app.get("/api/queue/status", response_class=JSONResponse)
+async def get_queue_status_api():
+    """Get task queue status"""
+    return get_queue_status()
+
+@app.on_event("startup")
+def start_preload():
+    """Load the memory store and agents in the background so startup isn't held up"""
+    startup.preload()
+
+@app.on_event("shutdown")
+def shutdown():
+    """Release background workers and flush memory on shutdown"""
+    task_queue.shutdown()
+    shutdown_memory()
+    webhook_delivery.shutdown()
+
 @app.get("/api/health", response_class=JSONResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check; answers as soon as the server is up, even while components load"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0",
+        "ready": startup.is_ready(),
         "openai_configured": bool(config.OPENAI_API_KEY),
         "n8n_configured": bool(config.N8N_WEBHOOK_URL)
     }
 
+@app.get("/api/ready", response_class=JSONResponse)
+async def readiness_check():
+    """Readiness check; 503 until the memory store and agents are loaded
+    
+    Includes per-component load times and import timings.
+    """
+    status = startup.get_status()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
 @app.get("/api/config", response_class=JSONResponse)
 async def get_config():
     """Get configuration info (without sensitive data)"""
@@ -158,6 +462,7 @@ async def get_config():
         "openai_configured": bool(config.OPENAI_API_KEY),
         "n8n_configured": bool(config.N8N_WEBHOOK_URL),
         "faiss_configured": True,
+        "task_types": list(PIPELINES),
         "memory_path": config.MEMORY_PATH
     }
 
@@ -169,7 +474,7 @@ async def get_n8n_status_api():
 @app.post("/api/n8n/test", response_class=JSONResponse)
 async def test_n8n_api():
     """Test n8n webhook connection"""
-    success = test_n8n_connection()
+    success = await run_in_threadpool(test_n8n_connection)
     return {
         "success": success,
         "message": "n8n connection test completed",
@@ -178,7 +483,7 @@ async def test_n8n_api():
 
 @app.post("/api/n8n/event", response_class=JSONResponse)
 async def send_n8n_event(event_type: str, data: dict):
-    """Send custom event to n8n"""
+    """Queue a custom event for delivery to n8n"""
     try:
         from n8n_integration import N8NEventType
         event_enum = N8NEventType(event_type)
@@ -0,0 +1,126 @@
+"""
+Memory Log Module for Autonomous Task Bot
+
+This module provides an append-only, line-delimited JSON log with
+periodic compaction into an atomically written snapshot. Appending a
+record costs the same regardless of how many records are stored, and a
+crash at any point leaves either the old or the new snapshot on disk.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+import config
+
+def atomic_write_json(path: str, data: Any):
+    """Write JSON to a temporary file and rename it over the target"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class AppendOnlyLog:
+    """Append-only record log with snapshot compaction
+
+    Every record gets a sequence number. The snapshot stores the last
+    sequence it contains, so records that survive in the log after a crash
+    during compaction are not replayed twice.
+    """
+
+    def __init__(self, log_path: str, snapshot_path: str, compact_every: Optional[int] = None,
+                 fsync: Optional[bool] = None):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every or config.MEMORY_COMPACT_EVERY
+        self.fsync = config.MEMORY_LOG_FSYNC if fsync is None else fsync
+        self.records: List[Dict[str, Any]] = []
+        self.last_seq = 0
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load the snapshot and replay the log on top of it"""
+        records: List[Dict[str, Any]] = []
+        snapshot_seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            records = snapshot.get("records", [])
+            snapshot_seq = snapshot.get("last_seq", 0)
+
+        self.last_seq = snapshot_seq
+        self.pending = 0
+        self.records = records
+        if os.path.exists(self.log_path):
+            valid_bytes = 0
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        print(f"⚠️ Dropping incomplete record at the end of {self.log_path}")
+                        break
+                    valid_bytes += len(line)
+                    if entry["seq"] <= snapshot_seq:
+                        continue
+                    records.append(entry["record"])
+                    self.last_seq = entry["seq"]
+                    self.pending += 1
+
+            # Cut the torn tail so the next append starts on a clean line
+            if valid_bytes < os.path.getsize(self.log_path):
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+
+        return records
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a record and return its sequence number"""
+        with self._lock:
+            self.last_seq += 1
+            line = json.dumps({"seq": self.last_seq, "record": record})
+            with open(self.log_path, 'a') as f:
+                f.write(line + "\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.pending += 1
+            self.records.append(record)
+            return self.last_seq
+
+    def needs_compaction(self) -> bool:
+        """Check if enough records have been appended since the last snapshot"""
+        return self.pending >= self.compact_every
+
+    def compact(self, keep: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        """Write the records to a new snapshot and truncate the log
+
+        If keep is given, only records it accepts are carried into the snapshot.
+        """
+        with self._lock:
+            if keep:
+                self.records = [record for record in self.records if keep(record)]
+            records = self.records
+            atomic_write_json(self.snapshot_path, {
+                "records": records,
+                "last_seq": self.last_seq,
+                "last_updated": datetime.now().isoformat()
+            })
+            # Safe to truncate: anything still in the log is covered by last_seq
+            with open(self.log_path, 'w'):
+                pass
+            self.pending = 0
+        print(f"✅ Compacted {self.log_path} into snapshot ({len(records)} records)")
+
+    def compact_if_needed(self):
+        """Compact when the log has grown past the configured threshold"""
+        if self.needs_compaction():
+            self.compact()
@@ -1,9 +1,16 @@
 import os
 import json
 import pickle
+import shutil
+import threading
+import time
+import atexit
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain.memory import ConversationBufferMemory
+from memory_log import AppendOnlyLog, atomic_write_json
+from keyword_index import BM25Index, reciprocal_rank_fusion
+from embedding_backends import create_embeddings, embedding_signature, signature_matches
 import config
 
 class MemoryManager:
@@ -13,77 +20,280 @@ class MemoryManager:
             memory_key="chat_history",
             return_messages=True
         )
+        self.memory_log = AppendOnlyLog(
+            os.path.join(self.memory_path, "memory_log.jsonl"),
+            os.path.join(self.memory_path, "memory_snapshot.json")
+        )
         self.vector_store = None
+        self.embeddings = None
+        self.metadata_index = None
+        self.keyword_index = BM25Index()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._dirty = 0
+        self._last_flush = time.time()
+        self._stop_flusher = threading.Event()
         self._load_memory()
+        
+        # Persist the FAISS index in the background instead of after every task
+        self._flusher = threading.Thread(target=self._flush_loop, name="faiss-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
     
     def _load_memory(self):
         """Load existing memory from disk"""
         try:
-            # Load conversation memory
-            memory_file = os.path.join(self.memory_path, "conversation_memory.json")
-            if os.path.exists(memory_file):
-                with open(memory_file, 'r') as f:
-                    memory_data = json.load(f)
-                    self.conversation_memory.chat_memory.messages = memory_data.get("messages", [])
+            # Load task records: snapshot plus replayed log
+            self._migrate_conversation_memory()
+            for record in self.memory_log.load():
+                self.conversation_memory.chat_memory.add_user_message(
+                    f"Task {record['task_id']}: {record.get('prompt', '')}"
+                )
+                self.keyword_index.add(record)
             
-            # Try to initialize FAISS if OpenAI API key is available
-            if config.OPENAI_API_KEY and config.OPENAI_API_KEY != "your_openai_api_key_here":
+            # Initialize FAISS with the configured embedding backend
+            self.embeddings = create_embeddings()
+            if self.embeddings:
                 try:
                     from langchain_community.vectorstores import FAISS
-                    from langchain_openai import OpenAIEmbeddings
-                    from langchain.schema import Document
-                    
-                    self.embeddings = OpenAIEmbeddings(openai_api_key=config.OPENAI_API_KEY)
                     
-                    # Load FAISS index
+                    # Load FAISS index, rebuilding it if it was embedded by another backend
                     faiss_path = config.FAISS_INDEX_PATH
+                    self._recover_index_swap(faiss_path)
+                    signature = embedding_signature(self.embeddings)
                     if os.path.exists(faiss_path):
-                        self.vector_store = FAISS.load_local(faiss_path, self.embeddings)
-                    else:
-                        # Create initial document to initialize FAISS
-                        initial_doc = Document(
-                            page_content="Initial memory document",
-                            metadata={
-                                'task_id': 'initial',
-                                'timestamp': datetime.now().isoformat(),
-                                'task_type': 'system',
-                                'result': 'System initialization'
-                            }
-                        )
-                        self.vector_store = FAISS.from_documents([initial_doc], self.embeddings)
+                        self.vector_store = self._load_index(FAISS, faiss_path)
+                        stored = self._read_index_signature(faiss_path)
+                        if not signature_matches(stored, signature, self.vector_store.index.d):
+                            print(f"⚠️ Embedding backend changed to {signature['model']}, rebuilding FAISS index")
+                            self.vector_store = None
+                    if not self.vector_store:
+                        self.vector_store = self._build_vector_store(FAISS)
                         print("✅ FAISS vector store initialized successfully")
+                    
+                    # Migrate to the configured index type (e.g. an existing flat index to HNSW)
+                    self.rebuild_index_if_needed()
+                    self._build_metadata_index()
                         
                 except Exception as e:
                     print(f"⚠️ Could not initialize FAISS: {e}")
                     self.vector_store = None
             else:
-                print("⚠️ OpenAI API key not configured, FAISS will be disabled")
                 self.vector_store = None
                 
         except Exception as e:
             print(f"Warning: Could not load memory: {e}")
             self.vector_store = None
     
+    def _load_index(self, FAISS, faiss_path: str):
+        """Load a saved index; it was written by this process, so its pickle is trusted"""
+        try:
+            return FAISS.load_local(faiss_path, self.embeddings, allow_dangerous_deserialization=True)
+        except TypeError:
+            # Older langchain-community versions don't take the flag
+            return FAISS.load_local(faiss_path, self.embeddings)
+    
+    def _read_index_signature(self, faiss_path: str) -> Optional[Dict[str, Any]]:
+        """Read the embedding signature saved with an index, if any"""
+        signature_file = os.path.join(faiss_path, "embedding.json")
+        if not os.path.exists(signature_file):
+            return None
+        with open(signature_file, 'r') as f:
+            return json.load(f)
+    
+    def _build_vector_store(self, FAISS):
+        """Embed every task record in the memory log into a new vector store"""
+        from langchain.schema import Document
+        
+        records = list(self.memory_log.records)
+        if not records:
+            # Create initial document to initialize FAISS
+            initial_doc = Document(
+                page_content="Initial memory document",
+                metadata={
+                    'task_id': 'initial',
+                    'timestamp': datetime.now().isoformat(),
+                    'task_type': 'system',
+                    'result': 'System initialization'
+                }
+            )
+            self._dirty += 1
+            return FAISS.from_documents([initial_doc], self.embeddings)
+        
+        started = time.time()
+        texts = [record.get('prompt', '') for record in records]
+        metadatas = [
+            {
+                'task_id': record.get('task_id'),
+                'timestamp': record.get('timestamp'),
+                'task_type': record.get('task_type', 'general'),
+                'result': record.get('result', '')
+            }
+            for record in records
+        ]
+        vectors = []
+        for start in range(0, len(texts), 256):
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + 256]))
+        self._dirty += len(records)
+        vector_store = FAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings, metadatas=metadatas)
+        print(f"✅ Embedded {len(records)} task records in {time.time() - started:.1f}s")
+        return vector_store
+    
+    def _build_metadata_index(self):
+        """Index the metadata of every stored vector by position for filtered search"""
+        from faiss_index import MetadataIndex
+        
+        metadata_index = MetadataIndex()
+        for position in range(self.vector_store.index.ntotal):
+            doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[position])
+            metadata_index.add(position, getattr(doc, "metadata", {}))
+        self.metadata_index = metadata_index
+    
+    def _migrate_conversation_memory(self):
+        """Convert a legacy conversation_memory.json into a memory snapshot"""
+        memory_file = os.path.join(self.memory_path, "conversation_memory.json")
+        if not os.path.exists(memory_file) or os.path.exists(self.memory_log.snapshot_path):
+            return
+        
+        with open(memory_file, 'r') as f:
+            memory_data = json.load(f)
+        
+        records = []
+        for message in memory_data.get("messages", []):
+            content = message.get("content", "") if isinstance(message, dict) else str(message)
+            # Messages were stored as "Task <id>: <prompt>"
+            task_id, _, prompt = content.partition(": ")
+            records.append({
+                "task_id": task_id.replace("Task ", "", 1),
+                "prompt": prompt,
+                "timestamp": memory_data.get("last_updated")
+            })
+        
+        atomic_write_json(self.memory_log.snapshot_path, {
+            "records": records,
+            "last_seq": 0,
+            "last_updated": datetime.now().isoformat()
+        })
+        os.replace(memory_file, f"{memory_file}.migrated")
+        print(f"✅ Migrated {len(records)} conversation messages to memory snapshot")
+    
     def save_memory(self):
         """Save memory to disk"""
         try:
-            # Save conversation memory
-            memory_file = os.path.join(self.memory_path, "conversation_memory.json")
-            memory_data = {
-                "messages": [msg.dict() for msg in self.conversation_memory.chat_memory.messages],
-                "last_updated": datetime.now().isoformat()
-            }
-            with open(memory_file, 'w') as f:
-                json.dump(memory_data, f, indent=2)
-            
-            # Save FAISS index
-            if self.vector_store:
-                faiss_path = config.FAISS_INDEX_PATH
-                self.vector_store.save_local(faiss_path)
+            # Task records are already in the append-only log; fold it into
+            # the snapshot and write out any unsaved index additions
+            if self.memory_log.pending:
+                self.memory_log.compact()
+            self.flush_index()
             
         except Exception as e:
             print(f"Warning: Could not save memory: {e}")
     
+    def flush_index(self):
+        """Write the FAISS index to disk if it has unsaved additions
+        
+        Only a snapshot is taken under the lock: the index serialized to a
+        byte buffer and shallow copies of the docstore mappings (the
+        documents themselves are shared, not copied). Pickling and disk
+        writes happen outside it, into a temporary directory that is then
+        swapped in by rename, so searches and additions aren't held up by
+        disk I/O and a crash never leaves a half-written index behind.
+        """
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        import faiss
+        
+        faiss_path = config.FAISS_INDEX_PATH
+        tmp_path, old_path = f"{faiss_path}.tmp", f"{faiss_path}.old"
+        
+        # One flush at a time, so two writers never share the temporary directory
+        with self._flush_lock:
+            with self._lock:
+                if not self.vector_store or not self._dirty:
+                    return
+                flushed = self._dirty
+                index_bytes = faiss.serialize_index(self.vector_store.index)
+                docstore = InMemoryDocstore(dict(self.vector_store.docstore._dict))
+                index_to_docstore_id = dict(self.vector_store.index_to_docstore_id)
+            
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            index_bytes.tofile(os.path.join(tmp_path, "index.faiss"))
+            with open(os.path.join(tmp_path, "index.pkl"), "wb") as f:
+                pickle.dump((docstore, index_to_docstore_id), f)
+            atomic_write_json(os.path.join(tmp_path, "embedding.json"), embedding_signature(self.embeddings))
+            if os.path.exists(faiss_path):
+                shutil.rmtree(old_path, ignore_errors=True)
+                os.rename(faiss_path, old_path)
+            os.rename(tmp_path, faiss_path)
+            shutil.rmtree(old_path, ignore_errors=True)
+            
+            with self._lock:
+                # Additions made while writing stay unsaved for the next flush
+                self._dirty -= flushed
+                self._last_flush = time.time()
+        print(f"✅ FAISS index saved ({flushed} new documents)")
+    
+    def rebuild_index_if_needed(self):
+        """Rebuild the FAISS index to match FAISS_INDEX_TYPE, or retrain a grown IVF index
+        
+        The new index is built outside the lock from a copy of the vectors;
+        anything added meanwhile is copied over before the swap.
+        """
+        from faiss_index import needs_rebuild, build_index, extract_vectors, tune_index, index_type_of
+        
+        index_type = config.FAISS_INDEX_TYPE
+        with self._lock:
+            if not self.vector_store:
+                return
+            index = self.vector_store.index
+            if not needs_rebuild(index, index_type):
+                tune_index(index)
+                return
+            previous_type = index_type_of(index)
+            vectors = extract_vectors(index)
+        
+        started = time.time()
+        new_index = build_index(index_type, index.d, vectors)
+        new_index.add(vectors)
+        
+        with self._lock:
+            # Positions are preserved, so the docstore mapping stays valid
+            new_index.add(extract_vectors(self.vector_store.index, start=len(vectors)))
+            self.vector_store.index = new_index
+            self._dirty += 1
+        print(f"✅ FAISS index rebuilt: {previous_type} -> {index_type_of(new_index)} "
+              f"({new_index.ntotal} vectors, {time.time() - started:.1f}s)")
+    
+    def close(self):
+        """Stop the background flusher and save everything"""
+        if self._stop_flusher.is_set():
+            return
+        self._stop_flusher.set()
+        self._flusher.join(timeout=5)
+        self.save_memory()
+    
+    def _flush_loop(self):
+        """Flush the index when enough additions pile up or the interval passes"""
+        while not self._stop_flusher.wait(1.0):
+            with self._lock:
+                due = self._dirty >= config.FAISS_FLUSH_THRESHOLD or (
+                    self._dirty and time.time() - self._last_flush >= config.FAISS_FLUSH_INTERVAL
+                )
+            if due:
+                try:
+                    self.rebuild_index_if_needed()
+                    self.flush_index()
+                except Exception as e:
+                    print(f"Warning: Could not save FAISS index: {e}")
+    
+    def _recover_index_swap(self, faiss_path: str):
+        """Restore the previous index if a crash interrupted the directory swap"""
+        old_path = f"{faiss_path}.old"
+        if not os.path.exists(faiss_path) and os.path.exists(old_path):
+            os.rename(old_path, faiss_path)
+            print("⚠️ Restored FAISS index from interrupted save")
+        shutil.rmtree(f"{faiss_path}.tmp", ignore_errors=True)
+    
     def add_task_memory(self, task_id: str, task_data: Dict[str, Any]):
         """Add task data to memory"""
         try:
@@ -92,55 +302,159 @@ class MemoryManager:
                 f"Task {task_id}: {task_data.get('prompt', '')}"
             )
             
+            # Persist the record with a constant-cost append
+            record = {
+                "task_id": task_id,
+                "prompt": task_data.get('prompt', ''),
+                "task_type": task_data.get('type', 'general'),
+                "timestamp": task_data.get('timestamp', datetime.now().isoformat()),
+                "result": task_data.get('result', '')
+            }
+            self.memory_log.append(record)
+            self.keyword_index.add(record)
+            
             # Add to vector store for semantic search if available
             if self.vector_store:
-                from langchain.schema import Document
-                doc = Document(
-                    page_content=task_data.get('prompt', ''),
-                    metadata={
-                        'task_id': task_id,
-                        'timestamp': datetime.now().isoformat(),
-                        'task_type': task_data.get('type', 'general'),
-                        'result': task_data.get('result', '')
-                    }
-                )
-                self.vector_store.add_documents([doc])
+                prompt = task_data.get('prompt', '')
+                metadata = {
+                    'task_id': task_id,
+                    # Same timestamp as the log and keyword index, so since/until agree across search modes
+                    'timestamp': record['timestamp'],
+                    'task_type': record['task_type'],
+                    'result': task_data.get('result', '')
+                }
+                # Embed outside the lock so searches aren't held up by the API call
+                embedding = self.embeddings.embed_query(prompt)
+                with self._lock:
+                    position = self.vector_store.index.ntotal
+                    self.vector_store.add_embeddings([(prompt, embedding)], metadatas=[metadata])
+                    self.metadata_index.add(position, metadata)
+                    self._dirty += 1
             
-            # Save memory
-            self.save_memory()
+            # Fold the log into the snapshot once it has grown enough;
+            # the index is persisted by the background flusher
+            self.memory_log.compact_if_needed()
             
         except Exception as e:
             print(f"Warning: Could not add task memory: {e}")
     
-    def search_similar_tasks(self, query: str, k: int = 5) -> List[Dict]:
-        """Search for similar tasks in memory"""
+    def search_similar_tasks(self, query: str, k: int = 5, task_type: Optional[str] = None,
+                             task_id: Optional[str] = None, since: Optional[str] = None,
+                             until: Optional[str] = None) -> List[Dict]:
+        """Search for similar tasks in memory
+        
+        Filters on task type, task ID and an ISO timestamp range are applied
+        inside the FAISS search, so k matching results come back even when
+        other task types dominate the index.
+        """
         try:
             if not self.vector_store:
                 return []
             
-            docs = self.vector_store.similarity_search(query, k=k)
-            return [
-                {
-                    'content': doc.page_content,
-                    'metadata': doc.metadata
-                }
-                for doc in docs
-            ]
+            embedding = self.embeddings.embed_query(query)
+            return self._search_vectors([embedding], k, task_type=task_type, task_id=task_id,
+                                        since=since, until=until)[0]
         except Exception as e:
             print(f"Warning: Could not search memory: {e}")
             return []
     
+    def search_similar_tasks_batch(self, queries: List[str], k: int = 5, task_type: Optional[str] = None,
+                                   task_id: Optional[str] = None, since: Optional[str] = None,
+                                   until: Optional[str] = None) -> List[List[Dict]]:
+        """Search for several queries at once, with one embedding call and one FAISS search"""
+        try:
+            if not self.vector_store or not queries:
+                return [[] for _ in queries]
+            
+            embeddings = self.embeddings.embed_documents(queries)
+            return self._search_vectors(embeddings, k, task_type=task_type, task_id=task_id,
+                                        since=since, until=until)
+        except Exception as e:
+            print(f"Warning: Could not search memory: {e}")
+            return [[] for _ in queries]
+    
+    def search_tasks(self, queries: List[str], k: int = 5, mode: str = "vector",
+                     **filters) -> List[List[Dict]]:
+        """Search memory by keyword (BM25), vector similarity, or both fused by rank
+        
+        Hybrid search falls back to keyword ranking alone when the vector
+        store is disabled, so it works without an OpenAI key.
+        """
+        if mode == "vector":
+            return self.search_similar_tasks_batch(queries, k, **filters)
+        
+        # Fetch deeper candidate lists so fusion has overlap to work with
+        depth = k if mode == "keyword" else max(k * 4, 20)
+        keyword = [self.keyword_index.search(query, depth, **filters) for query in queries]
+        if mode == "keyword":
+            return keyword
+        
+        vector = self.search_similar_tasks_batch(queries, depth, **filters)
+        return [
+            reciprocal_rank_fusion({"keyword": keyword_results, "vector": vector_results}, k)
+            for keyword_results, vector_results in zip(keyword, vector)
+        ]
+    
+    def _search_vectors(self, embeddings: List[List[float]], k: int, **filters) -> List[List[Dict]]:
+        """Run a filtered multi-query FAISS search and return results per query"""
+        from faiss_index import search_index
+        
+        with self._lock:
+            allowed = self.metadata_index.select(**filters)
+            distances, positions = search_index(self.vector_store.index, embeddings, k, allowed)
+            return [self._to_results(row_distances, row_positions)
+                    for row_distances, row_positions in zip(distances, positions)]
+    
+    def _to_results(self, distances, positions) -> List[Dict]:
+        """Look up the documents for FAISS positions and score them"""
+        from faiss_index import similarity_from_distance
+        
+        results = []
+        for distance, position in zip(distances, positions):
+            if position < 0:
+                continue
+            doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(position)])
+            results.append({
+                'content': doc.page_content,
+                'metadata': doc.metadata,
+                'score': similarity_from_distance(float(distance))
+            })
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get memory system statistics"""
+        stats = {
+            "vector_store_enabled": self.vector_store is not None,
+            "documents": self.vector_store.index.ntotal if self.vector_store else 0,
+            "index": None,
+            "conversation_messages": len(self.conversation_memory.chat_memory.messages),
+            "task_records": len(self.memory_log.records),
+            "log_records_since_snapshot": self.memory_log.pending,
+            "unsaved_index_documents": self._dirty,
+            "metadata_index": None,
+            "keyword_index": self.keyword_index.get_stats(),
+            "embeddings": embedding_signature(self.embeddings) if self.embeddings else None,
+            "embedding_cache": None
+        }
+        if self.vector_store:
+            from faiss_index import describe_index
+            stats["index"] = describe_index(self.vector_store.index)
+            stats["metadata_index"] = self.metadata_index.get_stats()
+        if hasattr(self.embeddings, "get_stats"):
+            stats["embedding_cache"] = self.embeddings.get_stats()
+        return stats
+    
     def get_task_history(self, limit: int = 10) -> List[Dict]:
-        """Get recent task history"""
+        """Get the most recent task records from the memory log, newest first"""
         try:
-            messages = self.conversation_memory.chat_memory.messages[-limit:]
             return [
                 {
-                    'role': msg.type,
-                    'content': msg.content,
-                    'timestamp': datetime.now().isoformat()
+                    'task_id': record.get('task_id'),
+                    'prompt': record.get('prompt', ''),
+                    'task_type': record.get('task_type', 'general'),
+                    'timestamp': record.get('timestamp')
                 }
-                for msg in messages
+                for record in reversed(self.memory_log.records[-limit:])
             ]
         except Exception as e:
             print(f"Warning: Could not get task history: {e}")
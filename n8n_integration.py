@@ -3,15 +3,17 @@ n8n Integration Module for Autonomous Task Bot
 
 This module provides comprehensive integration with n8n workflows,
 including webhook notifications, task tracking, and automation triggers.
+
+Task results larger than N8N_RESULT_INLINE_MAX bytes are not embedded in
+events; the event carries a summary and the URL of the stored report.
 """
 
-import requests
 import json
-import time
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import config
 from enum import Enum
+from webhook_delivery import webhook_delivery
 
 class N8NEventType(Enum):
     """Enum for different n8n event types"""
@@ -27,29 +29,45 @@ class N8NIntegration:
     
     def __init__(self, webhook_url: Optional[str] = None):
         self.webhook_url = webhook_url or config.N8N_WEBHOOK_URL
-        self.max_retries = 3
-        self.retry_delay = 1
-        self.timeout = 10
+        self.delivery = webhook_delivery
+        self.max_retries = self.delivery.max_retries
+        self.timeout = self.delivery.timeout
         
     def is_configured(self) -> bool:
         """Check if n8n is properly configured"""
         return bool(self.webhook_url)
     
-    def send_event(self, event_type: N8NEventType, data: Dict[str, Any]) -> bool:
-        """Send an event to n8n webhook"""
+    def send_event(self, event_type: N8NEventType, data: Dict[str, Any], wait: bool = False) -> bool:
+        """Send an event to n8n webhook
+        
+        By default the event is queued for background delivery and True means
+        it was accepted; with wait=True it is sent immediately and True means
+        n8n answered 200.
+        """
         if not self.is_configured():
             print("⚠️ N8N_WEBHOOK_URL not configured, skipping n8n notification")
             return False
         
-        payload = {
+        payload = self.build_payload(event_type, data)
+        if wait:
+            return self.delivery.send_now(self.webhook_url, payload)
+        # Progress events can be coalesced, so key them by task, and by agent
+        # where there is one: parallel agents of a task don't supersede each other
+        coalesce_key = data.get("task_id")
+        if coalesce_key is not None and data.get("agent_name"):
+            coalesce_key = f"{coalesce_key}:{data['agent_name']}"
+        return self.delivery.enqueue(self.webhook_url, payload, description="Event",
+                                     event_type=event_type.value, coalesce_key=coalesce_key)
+    
+    def build_payload(self, event_type: N8NEventType, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap event data in the standard envelope"""
+        return {
             "event_type": event_type.value,
             "timestamp": datetime.now().isoformat(),
             "source": "autonomous-task-bot",
             "version": "1.0.0",
             "data": data
         }
-        
-        return self._send_with_retry(payload)
     
     def send_task_started(self, task_id: str, prompt: str, task_type: str = "general") -> bool:
         """Send task started event"""
@@ -66,7 +84,7 @@ class N8NIntegration:
         """Send task completed event"""
         data = {
             "task_id": task_id,
-            "result": result,
+            **offload_result(task_id, result),
             "task_type": task_type,
             "status": "completed",
             "execution_time": execution_time
@@ -114,33 +132,22 @@ class N8NIntegration:
             "details": details
         }
         return self.send_event(N8NEventType.SYSTEM_HEALTH, data)
-    
-    def _send_with_retry(self, payload: Dict[str, Any]) -> bool:
-        """Send payload to n8n with retry logic"""
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    self.webhook_url,
-                    json=payload,
-                    timeout=self.timeout,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Event sent to n8n successfully (attempt {attempt + 1})")
-                    return True
-                else:
-                    print(f"⚠️ Failed to send to n8n: {response.status_code} - {response.text}")
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Network error sending to n8n (attempt {attempt + 1}): {e}")
-                
-            if attempt < self.max_retries - 1:
-                time.sleep(self.retry_delay)
-                self.retry_delay *= 2  # Exponential backoff
-                
-        print(f"❌ Failed to send to n8n after {self.max_retries} attempts")
-        return False
+
+def report_url(task_id: str) -> str:
+    """Public URL of a task's stored report"""
+    return f"{config.PUBLIC_BASE_URL}/api/reports/{task_id}"
+
+def offload_result(task_id: str, result: str) -> Dict[str, Any]:
+    """Result fields for a webhook payload, replacing a large result with a summary and report link"""
+    size = len(result.encode("utf-8"))
+    if size <= config.N8N_RESULT_INLINE_MAX:
+        return {"result": result}
+    return {
+        "result": result[:config.N8N_RESULT_SUMMARY_CHARS],
+        "result_truncated": True,
+        "result_length": size,
+        "report_url": report_url(task_id)
+    }
 
 # Global n8n integration instance
 n8n = N8NIntegration()
@@ -151,7 +158,8 @@ def get_n8n_status() -> Dict[str, Any]:
         "configured": n8n.is_configured(),
         "webhook_url": n8n.webhook_url if n8n.is_configured() else None,
         "max_retries": n8n.max_retries,
-        "timeout": n8n.timeout
+        "timeout": n8n.timeout,
+        "delivery": n8n.delivery.get_status()
     }
 
 def test_n8n_connection() -> bool:
@@ -165,4 +173,4 @@ def test_n8n_connection() -> bool:
         "timestamp": datetime.now().isoformat()
     }
     
-    return n8n.send_event(N8NEventType.SYSTEM_HEALTH, test_data) 
\ No newline at end of file
+    return n8n.send_event(N8NEventType.SYSTEM_HEALTH, test_data, wait=True) 
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Outbox Module for Autonomous Task Bot
+
+This module persists outbound webhook events to an append-only spool
+before they are delivered, and records an acknowledgement once each one
+is. Events without an acknowledgement survive restarts and are replayed,
+giving at-least-once delivery; every event carries a unique ID so the
+receiver can drop duplicates.
+"""
+
+import os
+import uuid
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from memory_log import AppendOnlyLog
+import config
+
+class Outbox:
+    """Durable spool of webhook events awaiting delivery"""
+
+    def __init__(self, path: Optional[str] = None, compact_every: Optional[int] = None,
+                 fsync: Optional[bool] = None):
+        self.path = path or config.N8N_OUTBOX_PATH
+        os.makedirs(self.path, exist_ok=True)
+        self.log = AppendOnlyLog(
+            os.path.join(self.path, "outbox_log.jsonl"),
+            os.path.join(self.path, "outbox_snapshot.json"),
+            compact_every=compact_every or config.N8N_OUTBOX_COMPACT_EVERY,
+            fsync=config.N8N_OUTBOX_FSYNC if fsync is None else fsync
+        )
+        self._unacked: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._acked: set = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def add(self, url: str, payload: Dict[str, Any], timeout: float, description: str,
+            event_type: Optional[str] = None, coalesce_key: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a new event and return it with its event ID"""
+        event = {
+            "type": "event",
+            "event_id": uuid.uuid4().hex,
+            "url": url,
+            "payload": payload,
+            "timeout": timeout,
+            "description": description,
+            "event_type": event_type,
+            "coalesce_key": coalesce_key,
+            "created_at": datetime.now().isoformat()
+        }
+        self.log.append(event)
+        with self._lock:
+            self._unacked[event["event_id"]] = event
+        return event
+
+    def ack(self, event_id: str):
+        """Record that an event was delivered"""
+        with self._lock:
+            if self._unacked.pop(event_id, None) is None:
+                return
+            self._acked.add(event_id)
+        self.log.append({"type": "ack", "event_id": event_id})
+        if self.log.needs_compaction():
+            self.compact()
+
+    def pending(self, limit: int, skip: Callable[[str], bool]) -> List[Dict[str, Any]]:
+        """Oldest unacknowledged events, leaving out those skip() rejects"""
+        events = []
+        with self._lock:
+            for event_id, event in self._unacked.items():
+                if len(events) >= limit:
+                    break
+                if not skip(event_id):
+                    events.append(event)
+        return events
+
+    def unacked_count(self) -> int:
+        """Number of events still awaiting delivery"""
+        with self._lock:
+            return len(self._unacked)
+
+    def compact(self):
+        """Rewrite the spool, dropping delivered events and their acknowledgements"""
+        with self._lock:
+            acked = set(self._acked)
+        # Anything added or acknowledged while compacting is kept as-is
+        self.log.compact(keep=lambda record: record["event_id"] not in acked)
+        with self._lock:
+            self._acked -= acked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Spool size for status endpoints"""
+        return {
+            "path": self.path,
+            "unacked": self.unacked_count(),
+            "log_records_since_snapshot": self.log.pending
+        }
+
+    def _load(self):
+        """Rebuild the set of unacknowledged events from the spool"""
+        for record in self.log.load():
+            if record.get("type") == "event":
+                self._unacked[record["event_id"]] = record
+            elif record.get("type") == "ack":
+                self._unacked.pop(record["event_id"], None)
+        if self._unacked:
+            print(f"📬 {len(self._unacked)} undelivered webhook events will be replayed")
@@ -0,0 +1,336 @@
+"""
+Pipeline Module for Autonomous Task Bot
+
+This module defines the agent stages of a task, the dependency graph
+(DAG) between them for each task type, and runs individual stages as
+single-task crews. Stage functions are executed inside crew worker
+processes, so they only exchange plain strings with the caller.
+
+Which stages a task type runs is declared in a JSON file of pipeline
+profiles (PIPELINES_PATH), so lightweight pipelines can be added or
+changed without code changes. Task types without a profile are rejected.
+
+CrewAI and the agents are only imported when a stage first runs (or when
+a worker starts, see load_agents), so importing this module is cheap.
+Each worker builds the stage crews once and reuses them for every task.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, List, Tuple
+import config
+
+# Ordered agent stages; "agent" names an Agent defined in agents.py
+STAGES: List[Dict[str, Any]] = [
+    {
+        "name": "research",
+        "agent": "researcher",
+        "description": """Research the following topic thoroughly: {prompt}
+
+        {context}
+
+        Focus on:
+        - Finding authoritative and recent sources
+        - Cross-referencing information for accuracy
+        - Identifying key trends and patterns
+        - Gathering quantitative and qualitative data
+        - Organizing findings in a structured manner""",
+        "expected_output": "Comprehensive research findings with sources and key insights"
+    },
+    {
+        "name": "plan",
+        "agent": "planner",
+        "description": """Based on the research findings, create a detailed action plan.
+
+        Focus on:
+        - Breaking down complex tasks into sequential steps
+        - Identifying dependencies and critical path
+        - Setting realistic timelines and milestones
+        - Defining clear deliverables and success criteria
+        - Anticipating potential challenges and mitigation strategies""",
+        "expected_output": "Detailed action plan with timeline, milestones, and deliverables"
+    },
+    {
+        "name": "execute",
+        "agent": "executor",
+        "description": """Execute the planned tasks with high quality and attention to detail.
+
+        Focus on:
+        - Following the established plan while remaining flexible
+        - Maintaining high standards of quality and accuracy
+        - Documenting progress and any deviations from plan
+        - Identifying and resolving issues proactively
+        - Ensuring deliverables meet or exceed expectations""",
+        "expected_output": "Completed deliverables with documentation of execution process"
+    },
+    {
+        "name": "bi_analysis",
+        "agent": "bi_analyst",
+        "description": """Analyze the research and execution results for business intelligence insights.
+
+        Focus on:
+        - Identifying key performance indicators and trends
+        - Analyzing competitive landscape and market positioning
+        - Providing actionable business recommendations
+        - Creating data visualizations and dashboards
+        - Forecasting potential outcomes and scenarios""",
+        "expected_output": "Business intelligence analysis with strategic insights and recommendations"
+    },
+    {
+        "name": "qa",
+        "agent": "qa_specialist",
+        "description": """Review and validate all deliverables for quality, accuracy, and completeness.
+
+        Focus on:
+        - Checking accuracy and completeness of information
+        - Validating sources and cross-referencing data
+        - Ensuring logical flow and coherence
+        - Identifying potential errors or inconsistencies
+        - Providing feedback for improvements""",
+        "expected_output": "Quality assurance report with validation results and improvement suggestions"
+    },
+    {
+        "name": "report",
+        "agent": "reporter",
+        "description": """Compile a comprehensive final report synthesizing all findings and results.
+
+        Focus on:
+        - Synthesizing information from all sources into coherent narratives
+        - Structuring reports with clear sections and logical flow
+        - Highlighting key insights and actionable recommendations
+        - Using appropriate formatting and visual elements
+        - Ensuring reports are accessible to target audiences""",
+        "expected_output": "Comprehensive final report with executive summary, findings, and recommendations"
+    }
+]
+
+STAGES_BY_NAME: Dict[str, Dict[str, Any]] = {stage["name"]: stage for stage in STAGES}
+
+# Stage dependencies per task type: stage -> stages whose output it needs.
+# Stages whose dependencies are all complete run concurrently.
+FULL_PIPELINE: Dict[str, List[str]] = {
+    "research": [],
+    "plan": ["research"],
+    "execute": ["research", "plan"],
+    "bi_analysis": ["research", "execute"],
+    "qa": ["research", "execute"],
+    "report": ["research", "plan", "execute", "bi_analysis", "qa"]
+}
+
+# Used when there is no pipeline profiles file
+BUILTIN_PROFILES: Dict[str, Dict[str, Any]] = {
+    "general": {"label": "General Task", "description": "All six agents", "stages": FULL_PIPELINE}
+}
+
+class UnknownTaskTypeError(ValueError):
+    """Raised for a task type that has no pipeline profile"""
+
+def validate_pipeline(dag: Dict[str, List[str]]):
+    """Check that a pipeline is an acyclic graph of known stages with one final stage"""
+    for stage, deps in dag.items():
+        if stage not in STAGES_BY_NAME:
+            raise ValueError(f"Unknown stage in pipeline: {stage}")
+        for dep in deps:
+            if dep not in dag:
+                raise ValueError(f"Stage {stage} depends on {dep}, which is not in the pipeline")
+
+    # Raises on cycles
+    execution_levels(dag)
+
+    sinks = final_stages(dag)
+    if len(sinks) != 1:
+        raise ValueError(f"Pipeline must have exactly one final stage, found: {sinks}")
+
+def execution_levels(dag: Dict[str, List[str]]) -> List[List[str]]:
+    """Group stages into waves that can run concurrently (Kahn's algorithm)"""
+    remaining = {stage: set(deps) for stage, deps in dag.items()}
+    levels = []
+    while remaining:
+        ready = [stage for stage, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle among: {sorted(remaining)}")
+        levels.append(ready)
+        for stage in ready:
+            del remaining[stage]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+def final_stages(dag: Dict[str, List[str]]) -> List[str]:
+    """Stages that no other stage depends on"""
+    needed = {dep for deps in dag.values() for dep in deps}
+    return [stage for stage in dag if stage not in needed]
+
+def critical_path(dag: Dict[str, List[str]], durations: Dict[str, float]) -> List[str]:
+    """Longest chain of dependent stages by duration"""
+    finish: Dict[str, float] = {}
+    previous: Dict[str, str] = {}
+    for level in execution_levels(dag):
+        for stage in level:
+            deps = dag[stage]
+            slowest = max(deps, key=lambda dep: finish[dep]) if deps else None
+            finish[stage] = (finish[slowest] if slowest else 0.0) + durations.get(stage, 0.0)
+            if slowest:
+                previous[stage] = slowest
+
+    path = [max(finish, key=finish.get)] if finish else []
+    while path and path[-1] in previous:
+        path.append(previous[path[-1]])
+    return list(reversed(path))
+
+def load_profiles(path: str) -> Tuple[Dict[str, Dict[str, Any]], str]:
+    """Read and validate pipeline profiles, returning them and the default task type
+    
+    The file maps each task type to a label, a description and its stage
+    graph, e.g. {"default": "general", "pipelines": {"quick": {"label":
+    "Quick Answer", "stages": {"research": [], "report": ["research"]}}}}.
+    """
+    if not os.path.exists(path):
+        print(f"⚠️ Pipeline profiles not found at {path}, using the built-in general pipeline")
+        return BUILTIN_PROFILES, "general"
+    
+    with open(path, 'r') as f:
+        data = json.load(f)
+    profiles = data.get("pipelines") or {}
+    if not profiles:
+        raise ValueError(f"No pipelines defined in {path}")
+    for task_type, profile in profiles.items():
+        if not isinstance(profile.get("stages"), dict):
+            raise ValueError(f"Pipeline {task_type} in {path} has no stages")
+        try:
+            validate_pipeline(profile["stages"])
+        except ValueError as e:
+            raise ValueError(f"Invalid pipeline {task_type} in {path}: {e}")
+    
+    default = data.get("default", next(iter(profiles)))
+    if default not in profiles:
+        raise ValueError(f"Default pipeline {default} is not defined in {path}")
+    return profiles, default
+
+PROFILES, DEFAULT_PIPELINE = load_profiles(config.PIPELINES_PATH)
+
+# Stage DAG per task type
+PIPELINES: Dict[str, Dict[str, List[str]]] = {
+    task_type: profile["stages"] for task_type, profile in PROFILES.items()
+}
+
+def get_pipeline(task_type: str = "general") -> Dict[str, List[str]]:
+    """Get the stage DAG for a task type"""
+    if task_type not in PIPELINES:
+        raise UnknownTaskTypeError(f"Unknown task type: {task_type} (expected one of {', '.join(PIPELINES)})")
+    return PIPELINES[task_type]
+
+def pipeline_agents(task_type: str) -> List[str]:
+    """Agents a task type runs, in stage order (empty for an unknown task type)"""
+    if task_type not in PIPELINES:
+        return []
+    return [STAGES_BY_NAME[stage]["agent"] for level in execution_levels(PIPELINES[task_type]) for stage in level]
+
+def list_pipelines() -> List[Dict[str, Any]]:
+    """Describe the available task types and the agents each one runs"""
+    pipelines = []
+    for task_type, profile in PROFILES.items():
+        stages = [stage for level in execution_levels(profile["stages"]) for stage in level]
+        pipelines.append({
+            "task_type": task_type,
+            "label": profile.get("label", task_type),
+            "description": profile.get("description", ""),
+            "stages": stages,
+            "agents": [STAGES_BY_NAME[stage]["agent"] for stage in stages],
+            "default": task_type == DEFAULT_PIPELINE
+        })
+    return pipelines
+
+def format_upstream(outputs: Dict[str, str]) -> str:
+    """Format earlier stage outputs as context for the next stage"""
+    if not outputs:
+        return ""
+    sections = [f"### Output of the {name} stage\n{output}" for name, output in outputs.items()]
+    return "Results from previous stages:\n\n" + "\n\n".join(sections)
+
+class CrewTemplateRegistry:
+    """One-task crews for each stage, built once per worker and reused for every task
+    
+    Stage descriptions keep {prompt}, {context} and {upstream} placeholders
+    that crew.kickoff fills in from its inputs, so a task only binds its
+    inputs instead of building new Task and Crew objects. Crews and their
+    agents hold per-run state, so each worker thread gets its own set, with
+    agents built for it rather than the shared instances in agents.py.
+    This relies on crewai (>= 0.27) keeping the original templates when it
+    interpolates inputs again on the next kickoff.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, stage_name: str):
+        """Get the crew for a stage, building it on first use in this thread"""
+        crews = self._crews()
+        crew = crews.get(stage_name)
+        if crew is None:
+            crew = crews[stage_name] = build_stage_crew(stage_name)
+        return crew
+
+    def build_all(self):
+        """Build the crews for every stage in this thread"""
+        for stage in STAGES:
+            self.get(stage["name"])
+
+    def _crews(self) -> Dict[str, Any]:
+        """This thread's crews by stage name"""
+        crews = getattr(self._local, "crews", None)
+        if crews is None:
+            crews = self._local.crews = {}
+        return crews
+
+# Global crew template registry (per worker process)
+crew_templates = CrewTemplateRegistry()
+
+def build_stage_crew(stage_name: str):
+    """Build the one-task crew for a stage, with its inputs left as placeholders"""
+    from crewai import Crew, Task
+    import agents
+    
+    stage = STAGES_BY_NAME[stage_name]
+    agent = agents.build_agent(stage["agent"])
+    task = Task(
+        description=stage["description"] + "\n\n{upstream}",
+        expected_output=stage["expected_output"],
+        agent=agent
+    )
+    return Crew(agents=[agent], tasks=[task], verbose=True)
+
+def bind_description(stage_name: str, prompt: str, context: str = "") -> str:
+    """A stage's task description and expected output with the task's prompt and context filled in"""
+    stage = STAGES_BY_NAME[stage_name]
+    return stage["description"].format(prompt=prompt, context=context) + "\n\n" + stage["expected_output"]
+
+def stage_inputs(prompt: str, task_type: str = "general", context: str = "", upstream: str = "") -> Dict[str, str]:
+    """Per-task values for the placeholders in a stage crew"""
+    return {"prompt": prompt, "context": context, "upstream": upstream, "task": prompt, "task_type": task_type}
+
+# Seconds spent importing CrewAI, building the agents and the stage crews in this process
+_agent_load_times: Dict[str, float] = {}
+
+def load_agents():
+    """Import CrewAI and build the agents and stage crews once per worker, returning load times"""
+    if not _agent_load_times:
+        started = time.perf_counter()
+        import crewai
+        _agent_load_times["crewai"] = round(time.perf_counter() - started, 3)
+        started = time.perf_counter()
+        import agents
+        _agent_load_times["agents"] = round(time.perf_counter() - started, 3)
+    started = time.perf_counter()
+    crew_templates.build_all()
+    _agent_load_times.setdefault("crew_templates", round(time.perf_counter() - started, 3))
+    return dict(_agent_load_times)
+
+def kickoff_stage(stage_name: str, prompt: str, task_type: str = "general",
+                  context: str = "", upstream: str = "") -> str:
+    """Run a single agent stage on its reusable crew and return its output"""
+    crew = crew_templates.get(stage_name)
+    result = crew.kickoff(stage_inputs(prompt, task_type, context, upstream))
+    return str(result)
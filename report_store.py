@@ -0,0 +1,192 @@
+"""
+Report Store Module for Autonomous Task Bot
+
+This module keeps task reports in an indexed SQLite database instead of
+one JSON file per task, so reports can be fetched by ID and listed by
+type or date without scanning the reports directory. Existing JSON
+reports are imported on first start.
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import config
+
+def normalize_timestamp(value: str) -> str:
+    """Convert an ISO 8601 timestamp to the stored format (naive local time)
+
+    Accepts a date alone, or a time with Z or an offset; the result compares
+    correctly as a string against stored timestamps. Raises ValueError for
+    anything that isn't ISO 8601.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+class ReportStore:
+    """SQLite-backed report storage with keyset-paginated listing"""
+
+    def __init__(self, db_path: Optional[str] = None, reports_path: Optional[str] = None):
+        self.reports_path = reports_path or config.REPORTS_PATH
+        self.db_path = db_path or config.REPORTS_DB_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS reports (
+                task_id TEXT PRIMARY KEY,
+                task_type TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                prompt TEXT,
+                result TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp, task_id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reports_type_timestamp ON reports (task_type, timestamp, task_id)"
+        )
+        self._conn.commit()
+        self._migrate_json_reports()
+
+    def save(self, task_id: str, result: str, task_type: str = "general",
+             prompt: Optional[str] = None, timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Insert or replace a task's report"""
+        report = {
+            "task_id": task_id,
+            "task_type": task_type,
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "prompt": prompt,
+            "result": result
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports (task_id, task_type, timestamp, prompt, result) "
+                "VALUES (:task_id, :task_type, :timestamp, :prompt, :result)",
+                report
+            )
+            self._conn.commit()
+        return report
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single report, or None if there is none"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT task_id, task_type, timestamp, prompt, result FROM reports WHERE task_id = ?",
+                (task_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("task_id", "task_type", "timestamp", "prompt", "result"), row))
+
+    def list(self, limit: int = 20, cursor: Optional[str] = None, task_type: Optional[str] = None,
+             since: Optional[str] = None, until: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List reports newest first, without their result bodies
+
+        Pages are keyed on (timestamp, task_id) rather than an offset, so
+        each page is an index range scan however deep the listing goes.
+        Returns the page and the cursor for the next one (None at the end).
+        since and until are normalized to the stored timestamp format first.
+        """
+        clauses, params = [], []
+        if task_type is not None:
+            clauses.append("task_type = ?")
+            params.append(task_type)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(normalize_timestamp(since))
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(normalize_timestamp(until))
+        if cursor:
+            timestamp, task_id = decode_cursor(cursor)
+            clauses.append("(timestamp < ? OR (timestamp = ? AND task_id < ?))")
+            params.extend([timestamp, timestamp, task_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id, task_type, timestamp, prompt, length(result) FROM reports {where} "
+                "ORDER BY timestamp DESC, task_id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+
+        reports = [
+            {"task_id": task_id, "task_type": task_type, "timestamp": timestamp,
+             "prompt": prompt, "result_length": result_length}
+            for task_id, task_type, timestamp, prompt, result_length in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = reports[-1]
+            next_cursor = encode_cursor(last["timestamp"], last["task_id"])
+        return reports, next_cursor
+
+    def count(self) -> int:
+        """Number of stored reports"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def close(self):
+        """Close the report database"""
+        with self._lock:
+            self._conn.close()
+
+    def _migrate_json_reports(self):
+        """Import legacy {task_id}.json reports and move them into migrated/"""
+        if not os.path.isdir(self.reports_path):
+            return
+        files = [entry for entry in os.scandir(self.reports_path)
+                 if entry.is_file() and entry.name.endswith(".json")]
+        if not files:
+            return
+
+        migrated_path = os.path.join(self.reports_path, "migrated")
+        os.makedirs(migrated_path, exist_ok=True)
+        imported = 0
+        for start in range(0, len(files), 1000):
+            batch, rows = files[start:start + 1000], []
+            for entry in batch:
+                try:
+                    with open(entry.path, 'r') as f:
+                        data = json.load(f)
+                    rows.append((
+                        data.get("task_id") or entry.name[:-len(".json")],
+                        data.get("task_type", "general"),
+                        data.get("timestamp") or datetime.fromtimestamp(entry.stat().st_mtime).isoformat(),
+                        data.get("prompt"),
+                        str(data.get("result", ""))
+                    ))
+                except Exception as e:
+                    print(f"⚠️ Skipping unreadable report {entry.name}: {e}")
+            with self._lock:
+                # Reports already in the store are newer than their JSON copy
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO reports (task_id, task_type, timestamp, prompt, result) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+            # Only move files once their batch is committed
+            for entry in batch:
+                shutil.move(entry.path, os.path.join(migrated_path, entry.name))
+            imported += len(rows)
+        print(f"✅ Migrated {imported} JSON reports into {self.db_path}")
+
+def encode_cursor(timestamp: str, task_id: str) -> str:
+    """Build an opaque page cursor from the last row's sort key"""
+    return f"{timestamp}|{task_id}"
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Split a page cursor back into its sort key"""
+    timestamp, separator, task_id = cursor.partition("|")
+    if not separator:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, task_id
+
+# Global report store instance
+report_store = ReportStore()
@@ -0,0 +1,135 @@
+"""
+Result Cache Module for Autonomous Task Bot
+
+This module caches completed task results keyed on the normalized prompt
+and task type, so repeated (and optionally near-duplicate) prompts are
+answered without running the crew again.
+"""
+
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, List
+import config
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially reworded submissions share a key"""
+    text = prompt.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+def make_cache_key(prompt: str, task_type: str = "general") -> str:
+    """Build the cache key for a prompt and task type"""
+    raw = f"{task_type}\n{normalize_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """In-memory LRU cache of task results with a TTL"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 semantic: Optional[bool] = None, semantic_threshold: Optional[float] = None):
+        self.max_entries = max_entries or config.RESULT_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else config.RESULT_CACHE_TTL
+        self.semantic = config.RESULT_CACHE_SEMANTIC if semantic is None else semantic
+        self.semantic_threshold = semantic_threshold or config.RESULT_CACHE_SEMANTIC_THRESHOLD
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.keys_by_task_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def get(self, prompt: str, task_type: str = "general",
+            search: Optional[Callable[..., List[Dict]]] = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached result
+
+        Tries an exact match on the normalized prompt first. In semantic mode,
+        falls back to the similarity search results (as returned by
+        MemoryManager.search_similar_tasks, filtered to the same task type)
+        and accepts a cached task whose score reaches the configured threshold.
+        """
+        entry = self._get_entry(make_cache_key(prompt, task_type))
+        if entry:
+            with self._lock:
+                self.hits += 1
+            return {**entry, "cache_match": "exact"}
+
+        if self.semantic and search:
+            for match in search(prompt, 3, task_type=task_type):
+                metadata = match.get("metadata", {})
+                score = match.get("score")
+                if score is None or score < self.semantic_threshold:
+                    continue
+                if metadata.get("task_type") != task_type:
+                    continue
+                key = self.keys_by_task_id.get(metadata.get("task_id"))
+                entry = self._get_entry(key) if key else None
+                if entry:
+                    with self._lock:
+                        self.semantic_hits += 1
+                    return {**entry, "cache_match": "semantic", "similarity": score}
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, task_type: str, task_id: str, result: str, timestamp: str):
+        """Store a completed task result"""
+        key = make_cache_key(prompt, task_type)
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.keys_by_task_id.pop(previous["task_id"], None)
+
+            self.entries[key] = {
+                "task_id": task_id,
+                "task_type": task_type,
+                "result": result,
+                "timestamp": timestamp,
+                "cached_at": time.time()
+            }
+            self.keys_by_task_id[task_id] = key
+
+            while len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.keys_by_task_id.pop(evicted["task_id"], None)
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self.entries.clear()
+            self.keys_by_task_id.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache configuration and hit counters"""
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "semantic": self.semantic,
+                "semantic_threshold": self.semantic_threshold,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.semantic_hits) / lookups if lookups else 0.0
+            }
+
+    def _get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch a live entry, expiring it if past its TTL"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            if self.ttl and time.time() - entry["cached_at"] > self.ttl:
+                del self.entries[key]
+                self.keys_by_task_id.pop(entry["task_id"], None)
+                return None
+            self.entries.move_to_end(key)
+            return {k: v for k, v in entry.items() if k != "cached_at"}
+
+# Global result cache instance
+result_cache = ResultCache()
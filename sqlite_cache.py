@@ -0,0 +1,27 @@
+"""
+SQLite Cache Helpers for Autonomous Task Bot
+
+This module holds the size bounding shared by the disk-backed caches
+(embedding_cache, stage_cache): tables keyed by "key" with a
+"last_used" timestamp column, trimmed to a maximum number of rows by
+evicting the least recently used.
+"""
+
+import sqlite3
+
+def evict_lru(conn: sqlite3.Connection, table: str, max_entries: int) -> int:
+    """Delete the least recently used rows beyond max_entries, returning how many were evicted
+
+    The caller holds its cache lock and commits.
+    """
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    overflow = count - max_entries
+    if overflow <= 0:
+        return 0
+    # Evict a little extra so we don't prune on every insert
+    evict = overflow + max_entries // 10
+    conn.execute(
+        f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY last_used LIMIT ?)",
+        (evict,)
+    )
+    return evict
@@ -0,0 +1,126 @@
+"""
+Stage Cache Module for Autonomous Task Bot
+
+This module caches the output of individual agent stages in SQLite, keyed
+by the stage's agent, a hash of its bound task description and a hash of
+the upstream stage outputs it was given. Tasks that repeat intermediate
+work (the same research topic under a different task type, say) reuse the
+cached stage output instead of calling the LLM again.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+from sqlite_cache import evict_lru
+import config
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class StageCache:
+    """Disk-backed stage output cache with a TTL and least-recently-used eviction"""
+
+    def __init__(self, cache_path: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.cache_path = cache_path or os.path.join(config.MEMORY_PATH, "stage_cache.sqlite")
+        self.ttl = ttl if ttl is not None else config.STAGE_CACHE_TTL
+        self.max_entries = max_entries or config.STAGE_CACHE_MAX_ENTRIES
+        self.stage_hits: Dict[str, int] = {}
+        self.stage_misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS stage_outputs (
+                key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                agent TEXT NOT NULL,
+                description_hash TEXT NOT NULL,
+                upstream_hash TEXT NOT NULL,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_stage_outputs_last_used ON stage_outputs (last_used)")
+        self._conn.commit()
+
+    def make_key(self, agent: str, description: str, upstream: str) -> Dict[str, str]:
+        """Build the cache key for an agent running a bound description on given upstream outputs"""
+        description_hash = text_hash(description)
+        upstream_hash = text_hash(upstream)
+        return {
+            "key": text_hash(f"{agent}\n{description_hash}\n{upstream_hash}"),
+            "agent": agent,
+            "description_hash": description_hash,
+            "upstream_hash": upstream_hash
+        }
+
+    def get(self, stage: str, key: Dict[str, str]) -> Optional[str]:
+        """Look up a stage output, counting the hit or miss for the stage"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, created_at FROM stage_outputs WHERE key = ?", (key["key"],)
+            ).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM stage_outputs WHERE key = ?", (key["key"],))
+                self._conn.commit()
+                row = None
+            if row:
+                self._conn.execute("UPDATE stage_outputs SET last_used = ? WHERE key = ?", (now, key["key"]))
+                self._conn.commit()
+                self.stage_hits[stage] = self.stage_hits.get(stage, 0) + 1
+                return row[0]
+            self.stage_misses[stage] = self.stage_misses.get(stage, 0) + 1
+            return None
+
+    def put(self, stage: str, key: Dict[str, str], output: str):
+        """Store a stage output and evict the least recently used overflow"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stage_outputs "
+                "(key, stage, agent, description_hash, upstream_hash, output, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key["key"], stage, key["agent"], key["description_hash"], key["upstream_hash"], output, now, now)
+            )
+            if self.ttl:
+                self._conn.execute("DELETE FROM stage_outputs WHERE created_at < ?", (now - self.ttl,))
+            evict_lru(self._conn, "stage_outputs", self.max_entries)
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and hit ratios, overall and per stage"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM stage_outputs").fetchone()[0]
+            stages = {}
+            for stage in sorted(set(self.stage_hits) | set(self.stage_misses)):
+                hits = self.stage_hits.get(stage, 0)
+                misses = self.stage_misses.get(stage, 0)
+                stages[stage] = {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+            hits = sum(self.stage_hits.values())
+            lookups = hits + sum(self.stage_misses.values())
+            return {
+                "path": self.cache_path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "stages": stages
+            }
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            self._conn.close()
+
+# Global stage cache instance
+stage_cache = StageCache()
@@ -0,0 +1,149 @@
+"""
+Startup Module for Autonomous Task Bot
+
+This module defers the heavy subsystems (the memory store with its FAISS
+index, and the CrewAI agents) until they are first needed, so the server
+can answer requests as soon as it starts. With STARTUP_PRELOAD enabled
+they are loaded by a background thread right after startup instead of on
+the first request that needs them. Load and import times are recorded for
+the readiness endpoint.
+"""
+
+import time
+import importlib
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+import config
+
+# Set when this module is first imported, which main does before anything else
+STARTED = time.perf_counter()
+
+class LazyComponent:
+    """A subsystem that is built on first use and then shared"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.status = "not_loaded"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.loaded_at: Optional[str] = None
+        self.imports: Dict[str, float] = {}
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """Check whether the component has been built"""
+        return self.status == "ready"
+
+    def get(self) -> Any:
+        """Return the component, building it first if needed
+
+        Concurrent callers wait for the one build. A failed build raises and
+        is tried again on the next call.
+        """
+        if self.status == "ready":
+            return self._value
+        with self._lock:
+            if self.status == "ready":
+                return self._value
+            self.status = "loading"
+            started = time.perf_counter()
+            try:
+                value = self.loader()
+            except Exception as e:
+                self.status = "failed"
+                self.error = str(e)
+                self.seconds = time.perf_counter() - started
+                print(f"❌ Could not load {self.name}: {e}")
+                raise
+            self._value = value
+            self.seconds = time.perf_counter() - started
+            self.loaded_at = datetime.now().isoformat()
+            self.error = None
+            self.status = "ready"
+            print(f"✅ Loaded {self.name} in {self.seconds:.2f}s")
+            return value
+
+    def peek(self) -> Any:
+        """Return the component if it is already built, without building it"""
+        return self._value if self.status == "ready" else None
+
+    def timed_import(self, module: str):
+        """Import a module, recording how long it took under this component"""
+        started = time.perf_counter()
+        imported = importlib.import_module(module)
+        self.imports[module] = round(time.perf_counter() - started, 3)
+        return imported
+
+    def get_status(self) -> Dict[str, Any]:
+        """Load state and timings for the readiness endpoint"""
+        return {
+            "status": self.status,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "loaded_at": self.loaded_at,
+            "imports": self.imports,
+            "error": self.error
+        }
+
+class Startup:
+    """Registry of lazily loaded components and the background preloader"""
+
+    def __init__(self, preload: Optional[bool] = None):
+        self.preload_enabled = config.STARTUP_PRELOAD if preload is None else preload
+        self.components: Dict[str, LazyComponent] = {}
+        self.app_import_seconds: Optional[float] = None
+        self.preload_started: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> LazyComponent:
+        """Declare a component; it is built by the preloader or on first get()"""
+        component = LazyComponent(name, loader)
+        self.components[name] = component
+        return component
+
+    def mark_imported(self):
+        """Record how long importing the app took"""
+        self.app_import_seconds = time.perf_counter() - STARTED
+
+    def preload(self):
+        """Load every component on a background thread, if preloading is enabled"""
+        if not self.preload_enabled or self._thread:
+            return
+        self.preload_started = time.perf_counter()
+        self._thread = threading.Thread(target=self._preload_all, name="startup-preload", daemon=True)
+        self._thread.start()
+
+    def is_ready(self) -> bool:
+        """Check whether the app can serve every request without a cold load
+
+        Without preloading, components load on first use, so the app counts
+        as ready straight away.
+        """
+        if not self.preload_enabled:
+            return all(component.status != "failed" for component in self.components.values())
+        return all(component.is_loaded for component in self.components.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Readiness, per-component load state and the startup time breakdown"""
+        return {
+            "ready": self.is_ready(),
+            "preload": self.preload_enabled,
+            "uptime": round(time.perf_counter() - STARTED, 3),
+            "app_import_seconds": round(self.app_import_seconds, 3) if self.app_import_seconds is not None else None,
+            "components": {name: component.get_status() for name, component in self.components.items()}
+        }
+
+    def _preload_all(self):
+        """Build components in registration order, continuing past failures"""
+        for component in self.components.values():
+            try:
+                component.get()
+            except Exception:
+                pass
+        print(f"🚀 Startup preload finished in {time.perf_counter() - self.preload_started:.2f}s")
+
+# Global startup instance
+startup = Startup()
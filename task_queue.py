@@ -0,0 +1,248 @@
+"""
+Task Queue Module for Autonomous Task Bot
+
+This module runs crew tasks in background worker threads so that task
+submission returns immediately and clients poll for status and results
+instead of holding the web server's event loop for the whole crew run.
+"""
+
+import math
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, Optional, Callable, List
+import config
+from crew_runner import run_task
+from worker_pool import crew_pool
+
+class TaskStatus(Enum):
+    """Enum for task lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class QueueFullError(Exception):
+    """Raised when the task queue has no room for another submission"""
+    
+    def __init__(self, queued: int, retry_after: int):
+        super().__init__(f"Task queue is full ({queued} tasks waiting)")
+        self.queued = queued
+        self.retry_after = retry_after
+
+class TaskJob:
+    """A submitted task and its lifecycle state"""
+
+    def __init__(self, task_id: str, prompt: str, task_type: str = "general", resume: bool = False,
+                 force_refresh: bool = False):
+        self.task_id = task_id
+        self.prompt = prompt
+        self.task_type = task_type
+        self.resume = resume
+        self.force_refresh = force_refresh
+        self.status = TaskStatus.QUEUED
+        self.submitted_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.schedule: Optional[Dict[str, Any]] = None
+        self.future: Optional[Future] = None
+        self.events: List[Dict[str, Any]] = []
+        self._events_lock = threading.Lock()
+
+    @property
+    def is_finished(self) -> bool:
+        """Check if the job has reached a terminal state"""
+        return self.status in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Execution time in seconds, if the job has started"""
+        if not self.started_at:
+            return None
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+    def add_event(self, event: Dict[str, Any]):
+        """Record a progress event; events are numbered in arrival order"""
+        with self._events_lock:
+            self.events.append({"id": len(self.events), **event})
+
+    def get_events(self, after: int = -1) -> List[Dict[str, Any]]:
+        """Get events with an ID greater than the given one"""
+        with self._events_lock:
+            return self.events[after + 1:]
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """Serialize the job for API responses"""
+        data = {
+            "task_id": self.task_id,
+            "prompt": self.prompt,
+            "task_type": self.task_type,
+            "status": self.status.value,
+            "resumed": self.resume,
+            "force_refresh": self.force_refresh,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": self.duration
+        }
+        if include_result:
+            if self.result is not None:
+                data["result"] = self.result
+            if self.error is not None:
+                data["error"] = self.error
+            if self.schedule is not None:
+                data["schedule"] = self.schedule
+        return data
+
+class TaskQueue:
+    """Runs submitted tasks on a background thread pool"""
+
+    def __init__(self, runner: Callable[..., Dict[str, Any]] = run_task,
+                 max_workers: Optional[int] = None, max_queued: Optional[int] = None,
+                 max_jobs: Optional[int] = None):
+        self.runner = runner
+        self.max_workers = max_workers or config.TASK_WORKERS
+        self.max_queued = max_queued if max_queued is not None else config.TASK_QUEUE_SIZE
+        self.max_jobs = max_jobs or config.TASK_HISTORY_LIMIT
+        self.avg_duration: Optional[float] = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="task-worker"
+        )
+        self.jobs: "OrderedDict[str, TaskJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: str, task_type: str = "general", task_id: Optional[str] = None,
+               resume: bool = False, force_refresh: bool = False) -> TaskJob:
+        """Queue a task for background execution and return its job
+        
+        Pass the task_id of a failed task with resume=True to rerun it from
+        its checkpoints. With force_refresh every stage calls its agent
+        instead of reusing cached stage outputs. Raises QueueFullError when the number of waiting
+        tasks has reached the configured queue size, and ValueError when the
+        task is already queued or running.
+        """
+        job = TaskJob(task_id or str(uuid.uuid4()), prompt, task_type, resume, force_refresh)
+
+        with self._lock:
+            existing = self.jobs.get(job.task_id)
+            if existing and not existing.is_finished:
+                raise ValueError(f"Task {job.task_id} is already {existing.status.value}")
+            queued = self._count(TaskStatus.QUEUED)
+            if queued >= self.max_queued:
+                raise QueueFullError(queued, self._estimate_wait())
+            # A resumed task replaces its earlier job and moves to the newest position
+            self.jobs.pop(job.task_id, None)
+            self.jobs[job.task_id] = job
+            self._evict_finished()
+
+        print(f"📥 Task {job.task_id} queued ({task_type}{', resuming' if resume else ''})")
+        job.add_event(self._lifecycle_event(job))
+        job.future = self.executor.submit(self._run_job, job)
+        return job
+
+    def get(self, task_id: str) -> Optional[TaskJob]:
+        """Look up a job by task ID"""
+        with self._lock:
+            return self.jobs.get(task_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get queue status counters"""
+        with self._lock:
+            counts = {status.value: 0 for status in TaskStatus}
+            for job in self.jobs.values():
+                counts[job.status.value] += 1
+
+        return {
+            "workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "tracked_jobs": sum(counts.values()),
+            "max_tracked_jobs": self.max_jobs,
+            "avg_duration": self.avg_duration,
+            "crew_pool": crew_pool.get_status(),
+            **counts
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release worker threads"""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+        crew_pool.shutdown(wait=wait)
+
+    def _run_job(self, job: TaskJob) -> Dict[str, Any]:
+        """Execute a job on a worker thread"""
+        job.status = TaskStatus.RUNNING
+        job.started_at = datetime.now()
+        job.add_event(self._lifecycle_event(job))
+
+        try:
+            result = self.runner(job.prompt, job.task_type, task_id=job.task_id, on_event=job.add_event,
+                                 resume=job.resume, force_refresh=job.force_refresh)
+        except Exception as e:
+            result = {
+                "task_id": job.task_id,
+                "status": TaskStatus.FAILED.value,
+                "error": f"Error: {str(e)}",
+                "task_type": job.task_type,
+                "timestamp": datetime.now().isoformat()
+            }
+
+        job.finished_at = datetime.now()
+        if result.get("status") == TaskStatus.COMPLETED.value:
+            job.result = result.get("result")
+            job.schedule = result.get("schedule")
+            job.status = TaskStatus.COMPLETED
+        else:
+            job.error = result.get("error", "Unknown error")
+            job.status = TaskStatus.FAILED
+
+        with self._lock:
+            # Exponential moving average of run time, used for Retry-After hints
+            if self.avg_duration is None:
+                self.avg_duration = job.duration
+            else:
+                self.avg_duration = 0.8 * self.avg_duration + 0.2 * job.duration
+
+        job.add_event(self._lifecycle_event(job, include_result=True))
+        print(f"📤 Task {job.task_id} {job.status.value} in {job.duration:.1f}s")
+        return result
+
+    def _lifecycle_event(self, job: TaskJob, include_result: bool = False) -> Dict[str, Any]:
+        """Build a task_<status> event from the job's current state"""
+        return {
+            "event": f"task_{job.status.value}",
+            "timestamp": datetime.now().isoformat(),
+            **job.to_dict(include_result=include_result)
+        }
+
+    def _count(self, status: TaskStatus) -> int:
+        """Count tracked jobs in a given state"""
+        return sum(1 for job in self.jobs.values() if job.status == status)
+
+    def _estimate_wait(self) -> int:
+        """Estimate seconds until a queued task starts and frees a slot"""
+        if not self.avg_duration:
+            return 30
+        # With all workers busy, one job finishes every avg_duration / workers seconds
+        return max(1, min(math.ceil(self.avg_duration / self.max_workers), 600))
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once the tracking limit is exceeded"""
+        overflow = len(self.jobs) - self.max_jobs
+        if overflow <= 0:
+            return
+
+        for task_id in [tid for tid, job in self.jobs.items() if job.is_finished][:overflow]:
+            del self.jobs[task_id]
+
+# Global task queue instance
+task_queue = TaskQueue()
+
+def get_queue_status() -> Dict[str, Any]:
+    """Get task queue status"""
+    return task_queue.get_status()
@@ -0,0 +1,254 @@
+"""
+Task Store Module for Autonomous Task Bot
+
+This module records one structured row per task run (prompt, type,
+status, start/finish times, duration) in SQLite, with a fixed-size ring
+buffer of the most recent runs in memory. Recent-N lookups are served
+from the ring buffer; deeper history is paged from disk by cursor.
+
+Each finished stage's output is also checkpointed under its task, so a
+failed run can be resumed from its first incomplete stage.
+"""
+
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from report_store import encode_cursor, decode_cursor
+import config
+
+FIELDS = ("task_id", "prompt", "task_type", "status", "started_at", "finished_at", "duration", "error")
+
+class TaskStore:
+    """Structured task records with an in-memory recent-N buffer"""
+
+    def __init__(self, db_path: Optional[str] = None, recent_limit: Optional[int] = None):
+        self.db_path = db_path or config.TASK_DB_PATH
+        self.recent_limit = recent_limit or config.TASK_RECENT_LIMIT
+        self._lock = threading.Lock()
+        # Newest last; records are shared with _recent_by_id so updates show in both
+        self._recent: deque = deque()
+        self._recent_by_id: Dict[str, Dict[str, Any]] = {}
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                prompt TEXT NOT NULL,
+                task_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                duration REAL,
+                error TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_started ON tasks (started_at, task_id)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                task_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                output TEXT NOT NULL,
+                finished_at TEXT NOT NULL,
+                PRIMARY KEY (task_id, stage)
+            )"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._recover_interrupted()
+        self._load_recent()
+
+    def start(self, task_id: str, prompt: str, task_type: str = "general") -> Dict[str, Any]:
+        """Record that a task has started running (again, when it is resumed)"""
+        record = {
+            "task_id": task_id,
+            "prompt": prompt,
+            "task_type": task_type,
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "duration": None,
+            "error": None
+        }
+        with self._lock:
+            self._write(record)
+            previous = self._recent_by_id.get(task_id)
+            if previous:
+                self._recent.remove(previous)
+                del self._recent_by_id[task_id]
+            self._remember(record)
+        return record
+
+    def finish(self, task_id: str, status: str, error: Optional[str] = None):
+        """Record a task's final status and duration"""
+        finished = datetime.now()
+        with self._lock:
+            record = self._recent_by_id.get(task_id) or self._read(task_id)
+            if not record:
+                return
+            record.update({
+                "status": status,
+                "finished_at": finished.isoformat(),
+                "duration": (finished - datetime.fromisoformat(record["started_at"])).total_seconds(),
+                "error": error
+            })
+            self._write(record)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single task record, or None if there is none"""
+        with self._lock:
+            record = self._recent_by_id.get(task_id) or self._read(task_id)
+            return dict(record) if record else None
+
+    def save_checkpoint(self, task_id: str, stage: str, output: str):
+        """Persist a finished stage's output under its task"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (task_id, stage, output, finished_at) VALUES (?, ?, ?, ?)",
+                (task_id, stage, output, datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def checkpoints(self, task_id: str) -> Dict[str, str]:
+        """Outputs of the stages a task has finished, by stage name"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, output FROM checkpoints WHERE task_id = ? ORDER BY finished_at", (task_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def clear_checkpoints(self, task_id: str):
+        """Drop a task's checkpoints once it has completed"""
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE task_id = ?", (task_id,))
+            self._conn.commit()
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent task records, newest first, without touching disk when they fit the buffer"""
+        with self._lock:
+            # A buffer that isn't full holds every task ever recorded
+            if limit <= len(self._recent) or len(self._recent) < self.recent_limit:
+                count = min(limit, len(self._recent))
+                return [dict(self._recent[-1 - i]) for i in range(count)]
+        return self.list(limit)[0]
+
+    def list(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page through task records newest first, keyed on (started_at, task_id)
+
+        Returns the page and the cursor for the next one (None at the end).
+        """
+        if cursor is None:
+            # First pages come straight from the ring buffer when it holds them
+            with self._lock:
+                buffered = len(self._recent)
+                if limit < buffered:
+                    page = [dict(self._recent[-1 - i]) for i in range(limit)]
+                    return page, encode_cursor(page[-1]["started_at"], page[-1]["task_id"])
+                if buffered < self.recent_limit:
+                    # The buffer holds every task ever recorded
+                    return [dict(record) for record in reversed(self._recent)], None
+
+        clauses, params = [], []
+        if cursor:
+            started_at, task_id = decode_cursor(cursor)
+            clauses.append("(started_at < ? OR (started_at = ? AND task_id < ?))")
+            params.extend([started_at, started_at, task_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM tasks {where} ORDER BY started_at DESC, task_id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+
+        page = [dict(zip(FIELDS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(page[-1]["started_at"], page[-1]["task_id"])
+        return page, next_cursor
+
+    def count(self) -> int:
+        """Number of recorded tasks"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def is_backfilled(self) -> bool:
+        """Check whether older memory records have already been imported"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM meta WHERE key = 'backfilled'").fetchone() is not None
+
+    def import_records(self, records: Iterable[Dict[str, Any]]):
+        """Backfill completed tasks from older memory records, once
+        
+        Tasks already in the store are kept as they are, so this is safe to
+        run after new tasks have been recorded.
+        """
+        rows = [
+            (record["task_id"], record.get("prompt", ""), record.get("task_type") or "general", "completed",
+             record.get("timestamp") or datetime.now().isoformat(), record.get("timestamp"), None, None)
+            for record in records if record.get("task_id")
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO tasks ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', ?)", (datetime.now().isoformat(),)
+            )
+            self._conn.commit()
+            if not rows:
+                return
+            self._recent.clear()
+            self._recent_by_id.clear()
+        self._load_recent()
+        print(f"✅ Imported {len(rows)} task records into {self.db_path}")
+
+    def close(self):
+        """Close the task database"""
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, record: Dict[str, Any]):
+        """Insert or update a record row"""
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO tasks ({', '.join(FIELDS)}) VALUES ({', '.join(':' + f for f in FIELDS)})",
+            record
+        )
+        self._conn.commit()
+
+    def _read(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a record row that has left the ring buffer"""
+        row = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def _remember(self, record: Dict[str, Any]):
+        """Push a record into the ring buffer, dropping the oldest when full"""
+        if len(self._recent) >= self.recent_limit:
+            oldest = self._recent.popleft()
+            self._recent_by_id.pop(oldest["task_id"], None)
+        self._recent.append(record)
+        self._recent_by_id[record["task_id"]] = record
+
+    def _load_recent(self):
+        """Fill the ring buffer from the newest rows on disk"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM tasks ORDER BY started_at DESC, task_id DESC LIMIT ?",
+                (self.recent_limit,)
+            ).fetchall()
+            for row in reversed(rows):
+                self._remember(dict(zip(FIELDS, row)))
+
+    def _recover_interrupted(self):
+        """Mark tasks left running by a previous process as failed"""
+        with self._lock:
+            interrupted = self._conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'Interrupted by restart' WHERE status = 'running'"
+            ).rowcount
+            self._conn.commit()
+        if interrupted:
+            print(f"⚠️ Marked {interrupted} interrupted tasks as failed")
+
+# Global task store instance
+task_store = TaskStore()
@@ -0,0 +1,388 @@
+"""
+Webhook Delivery Module for Autonomous Task Bot
+
+This module delivers outbound webhook payloads (n8n events) from a
+background worker, so callers only pay for an enqueue and task latency
+doesn't depend on the webhook's health. Requests share one keep-alive
+session.
+
+Events are written to a durable outbox before delivery and acknowledged
+after it, so events that outlast their retries are retried again later
+and anything undelivered at shutdown is replayed on the next start. Each
+event carries an event_id (also sent as the Idempotency-Key header) for
+receivers to drop duplicates. The in-memory buffer is bounded; events
+that don't fit wait in the outbox.
+
+High-frequency event types can be batched (up to N8N_BATCH_SIZE events
+or N8N_BATCH_INTERVAL_MS per POST, sent as a JSON array) and coalesced
+(a newer event for the same task replaces one still waiting to be sent).
+
+Each webhook URL has a circuit breaker: retries use capped, jittered
+backoff (or the endpoint's Retry-After), and once the endpoint keeps
+failing the breaker opens so events go straight back to the outbox
+instead of tying up the sender with timeouts and sleeps.
+
+Bodies of N8N_GZIP_MIN_BYTES or more are sent gzip-compressed
+(Content-Encoding: gzip) unless N8N_GZIP is off.
+"""
+
+import time
+import gzip
+import json
+import uuid
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Set
+import requests
+from requests.adapters import HTTPAdapter
+from circuit_breaker import CLOSED, CircuitBreaker, backoff_delay, parse_retry_after
+import config
+
+class WebhookDelivery:
+    """Bounded delivery queue with one background sender and an optional durable outbox"""
+
+    def __init__(self, max_queued: Optional[int] = None, max_retries: Optional[int] = None,
+                 timeout: Optional[float] = None, pool_size: Optional[int] = None,
+                 outbox=None):
+        self.max_queued = max_queued or config.N8N_QUEUE_SIZE
+        self.max_retries = max_retries or config.N8N_MAX_RETRIES
+        self.timeout = timeout or config.N8N_TIMEOUT
+        self.redelivery_interval = config.N8N_REDELIVERY_INTERVAL
+        self.outbox = outbox
+        self.batch_types = set(config.N8N_BATCH_EVENT_TYPES)
+        self.batch_size = config.N8N_BATCH_SIZE
+        self.batch_interval = config.N8N_BATCH_INTERVAL_MS / 1000
+        self.coalesce_types = set(config.N8N_COALESCE_EVENT_TYPES)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size or config.N8N_POOL_SIZE,
+                              pool_maxsize=pool_size or config.N8N_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.deferred = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.body_bytes = 0
+        self.wire_bytes = 0
+        self._pending: deque = deque()
+        self._queued_ids: Set[str] = set()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._superseded: Set[str] = set()
+        self._retry_at: Dict[str, float] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+
+        # Replay whatever a previous process left undelivered
+        if self.outbox and self.outbox.unacked_count():
+            with self._condition:
+                self._ensure_worker()
+
+    def enqueue(self, url: str, payload: Dict[str, Any], timeout: Optional[float] = None,
+                description: str = "Event", event_type: Optional[str] = None,
+                coalesce_key: Optional[str] = None) -> bool:
+        """Queue a payload for delivery and return immediately
+        
+        event_type selects the batching and coalescing policy; events of a
+        coalesced type with the same coalesce_key (e.g. task_id) replace
+        each other while they wait.
+        """
+        if self._stopping:
+            return False
+        timeout = timeout or self.timeout
+        if event_type not in self.coalesce_types:
+            coalesce_key = None
+        if self.outbox:
+            event = self.outbox.add(url, payload, timeout, description, event_type, coalesce_key)
+        else:
+            event = {"event_id": uuid.uuid4().hex, "url": url, "payload": payload, "timeout": timeout,
+                     "description": description, "event_type": event_type, "coalesce_key": coalesce_key}
+
+        superseded = None
+        with self._condition:
+            if coalesce_key is not None:
+                key = f"{event_type}:{coalesce_key}"
+                previous = self._latest.get(key)
+                if previous and previous["event_id"] in self._queued_ids:
+                    superseded = previous["event_id"]
+                    self._superseded.add(superseded)
+                    self.coalesced += 1
+                self._latest[key] = event
+            if len(self._pending) >= self.max_queued:
+                # With an outbox the oldest event stays on disk and is picked up again later
+                oldest = self._pending.popleft()
+                self._queued_ids.discard(oldest["event_id"])
+                self._superseded.discard(oldest["event_id"])
+                if not self.outbox:
+                    self.dropped += 1
+                    print(f"⚠️ Webhook queue full, dropped oldest pending event ({self.dropped} dropped)")
+            self._pending.append(event)
+            self._queued_ids.add(event["event_id"])
+            self._ensure_worker()
+            self._condition.notify()
+        if superseded and self.outbox:
+            # The newer event carries the current state; never replay the old one
+            self.outbox.ack(superseded)
+        return True
+
+    def send_now(self, url: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> bool:
+        """Deliver a payload synchronously on the shared session, without retries
+
+        This bypasses an open breaker (it is used for connection tests) but
+        its outcome still counts towards the breaker state.
+        """
+        breaker = self._breaker_for(url)
+        try:
+            response = self._post(url, payload, {}, timeout or self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Network error sending to n8n: {e}")
+            breaker.record_failure()
+            return False
+        if response.status_code == 200:
+            breaker.record_success()
+            return True
+        breaker.record_failure(self._retry_after(response))
+        return False
+
+    def get_status(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters"""
+        with self._condition:
+            status = {
+                "queued": len(self._pending),
+                "in_flight": self._in_flight,
+                "max_queued": self.max_queued,
+                "sent": self.sent,
+                "failed": self.failed,
+                "deferred": self.deferred,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "coalesced": self.coalesced,
+                "body_bytes": self.body_bytes,
+                "wire_bytes": self.wire_bytes,
+                "outbox": None
+            }
+            breakers = dict(self._breakers)
+        status["breakers"] = {url: breaker.get_status() for url, breaker in breakers.items()}
+        if self.outbox:
+            status["outbox"] = self.outbox.get_stats()
+        return status
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop accepting payloads and give pending ones a chance to go out"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._worker:
+            self._worker.join(timeout=timeout)
+        if self.outbox and self.outbox.unacked_count():
+            print(f"📬 {self.outbox.unacked_count()} webhook events kept in the outbox for replay")
+        elif self._pending:
+            print(f"⚠️ {len(self._pending)} webhook events were not delivered before shutdown")
+        self.session.close()
+
+    def _ensure_worker(self):
+        """Start the sender thread on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="webhook-delivery", daemon=True)
+            self._worker.start()
+
+    def _breaker_for(self, url: str) -> CircuitBreaker:
+        """Circuit breaker for a webhook URL, created on first use"""
+        with self._condition:
+            breaker = self._breakers.get(url)
+            if breaker is None:
+                breaker = self._breakers[url] = CircuitBreaker()
+            return breaker
+
+    def _post(self, url: str, body: Any, headers: Dict[str, str], timeout: float) -> requests.Response:
+        """POST a JSON body, gzip-compressed when it is large enough to be worth it"""
+        data = json.dumps(body).encode("utf-8")
+        body_size = len(data)
+        headers = {**headers, "Content-Type": "application/json"}
+        if config.N8N_GZIP and body_size >= config.N8N_GZIP_MIN_BYTES:
+            data = gzip.compress(data, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        with self._condition:
+            self.body_bytes += body_size
+            self.wire_bytes += len(data)
+        return self.session.post(url, data=data, headers=headers, timeout=timeout)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Retry-After of a throttling or unavailable response, in seconds"""
+        if response.status_code not in (429, 503):
+            return None
+        return parse_retry_after(response.headers.get("Retry-After"))
+
+    def _refill(self):
+        """Pull outbox events that aren't queued or waiting out a retry delay back into memory"""
+        now = time.time()
+        skip = lambda event_id: event_id in self._queued_ids or self._retry_at.get(event_id, 0) > now
+        for event in self.outbox.pending(self.max_queued - len(self._pending), skip):
+            self._pending.append(event)
+            self._queued_ids.add(event["event_id"])
+
+    def _run(self):
+        """Deliver queued payloads in order until stopped and drained"""
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    if self.outbox:
+                        self._refill()
+                        if self._pending:
+                            break
+                    # Poll while deferred events wait in the outbox for their next attempt
+                    self._condition.wait(timeout=1.0 if self._retry_at else None)
+                if not self._pending:
+                    return
+                events = self._take_batch()
+                if not events:
+                    continue
+                self._in_flight = len(events)
+
+            delivered = self._deliver(events)
+            # Don't bring events back before the breaker will let them through
+            retry_delay = max(self.redelivery_interval, self._breaker_for(events[0]["url"]).retry_in())
+            if delivered and self.outbox:
+                for event in events:
+                    self.outbox.ack(event["event_id"])
+            with self._condition:
+                self._in_flight = 0
+                for event in events:
+                    self._queued_ids.discard(event["event_id"])
+                    self._forget_latest(event)
+                    if delivered:
+                        self._retry_at.pop(event["event_id"], None)
+                    elif self.outbox:
+                        # Keep it in the outbox and try again later
+                        self._retry_at[event["event_id"]] = time.time() + retry_delay
+                if delivered:
+                    self.sent += len(events)
+                    if events[0].get("event_type") in self.batch_types:
+                        self.batches += 1
+                elif self.outbox:
+                    self.deferred += len(events)
+                else:
+                    self.failed += len(events)
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Pop the next event, plus following events it can be batched with
+
+        Called with the condition held. A batchable event waits up to the
+        batch interval for more events of the same type and URL; batches
+        only take consecutive events so delivery order is kept.
+        """
+        event = self._pop_live()
+        if event is None:
+            return []
+        if event.get("event_type") not in self.batch_types:
+            return [event]
+
+        batch = [event]
+        deadline = time.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            while not self._pending and not self._stopping:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+            if not self._pending:
+                break
+            following = self._pending[0]
+            if following["event_id"] in self._superseded:
+                self._pop_live()
+                continue
+            if following.get("event_type") != event.get("event_type") or following["url"] != event["url"]:
+                break
+            batch.append(self._pending.popleft())
+        return batch
+
+    def _pop_live(self) -> Optional[Dict[str, Any]]:
+        """Pop the next event that hasn't been superseded by a newer one"""
+        while self._pending:
+            event = self._pending.popleft()
+            if event["event_id"] not in self._superseded:
+                return event
+            self._superseded.discard(event["event_id"])
+            self._queued_ids.discard(event["event_id"])
+        return None
+
+    def _forget_latest(self, event: Dict[str, Any]):
+        """Drop an event from the coalescing table once it has left the queue"""
+        if event.get("coalesce_key") is None:
+            return
+        key = f"{event['event_type']}:{event['coalesce_key']}"
+        if self._latest.get(key) is event:
+            del self._latest[key]
+
+    def _deliver(self, events: List[Dict[str, Any]]) -> bool:
+        """POST an event, or a batch of events as a JSON array, with jittered backoff
+
+        Stops early once the endpoint's breaker opens (after repeated
+        failures or a Retry-After), rather than sleeping through retries.
+        """
+        payloads = [{**event["payload"], "event_id": event["event_id"]} for event in events]
+        if events[0].get("event_type") in self.batch_types:
+            body = payloads
+            # Stable key for the same batch; receivers should still dedupe per event_id
+            batch_key = uuid.uuid5(uuid.NAMESPACE_OID, ",".join(p["event_id"] for p in payloads)).hex
+            headers = {"Idempotency-Key": batch_key, "X-Batch-Size": str(len(payloads))}
+            description = f"Batch of {len(events)} {events[0]['event_type']} events"
+        else:
+            body = payloads[0]
+            headers = {"Idempotency-Key": events[0]["event_id"]}
+            description = events[0]["description"]
+
+        breaker = self._breaker_for(events[0]["url"])
+        for attempt in range(self.max_retries):
+            if not breaker.allow():
+                # Fail fast; the events wait in the outbox until the breaker half-opens
+                print(f"🔌 {description} not sent, n8n circuit open "
+                      f"(retry in {breaker.retry_in():.0f}s)")
+                return False
+
+            retry_after = None
+            try:
+                response = self._post(events[0]["url"], body, headers, events[0]["timeout"])
+                if response.status_code == 200:
+                    breaker.record_success()
+                    print(f"✅ {description} sent to n8n successfully (attempt {attempt + 1})")
+                    return True
+                retry_after = self._retry_after(response)
+                print(f"⚠️ Failed to send to n8n: {response.status_code} - {response.text}")
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Network error sending to n8n (attempt {attempt + 1}): {e}")
+            last_attempt = attempt == self.max_retries - 1
+            if retry_after is not None and retry_after <= config.N8N_BACKOFF_CAP and not last_attempt:
+                # A short Retry-After is honored in place of our own backoff
+                breaker.record_failure()
+                delay = retry_after
+            else:
+                # Otherwise Retry-After opens the breaker for that long
+                breaker.record_failure(retry_after)
+                delay = backoff_delay(attempt)
+            if last_attempt or breaker.state != CLOSED:
+                break
+            time.sleep(delay)
+
+        if self.outbox:
+            retry_in = max(self.redelivery_interval, breaker.retry_in())
+            print(f"⚠️ {description} not delivered after {attempt + 1} attempts, "
+                  f"retrying in {retry_in:.0f}s")
+        else:
+            print(f"❌ Failed to send to n8n after {attempt + 1} attempts")
+        return False
+
+def create_outbox():
+    """Open the durable outbox if enabled"""
+    if not config.N8N_OUTBOX_ENABLED:
+        return None
+    from outbox import Outbox
+    return Outbox()
+
+# Global webhook delivery instance
+webhook_delivery = WebhookDelivery(outbox=create_outbox())
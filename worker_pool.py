@@ -0,0 +1,118 @@
+"""
+Worker Pool Module for Autonomous Task Bot
+
+This module runs crew kickoffs in a pool of worker processes so that
+concurrent crews can use more than one CPU core and the number of crews
+running at once is bounded by configuration. An optional initializer
+runs once in each worker as it starts (e.g. to build the agents).
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, BrokenExecutor
+from typing import Dict, Any, List, Optional, Callable
+from pipeline import load_agents
+import config
+
+class CrewWorkerPool:
+    """Process pool for executing crew jobs"""
+    
+    def __init__(self, max_workers: Optional[int] = None, mode: Optional[str] = None,
+                 initializer: Optional[Callable[[], Any]] = None):
+        self.max_workers = max_workers or config.CREW_WORKERS
+        self.mode = mode or config.CREW_EXECUTOR
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+    
+    def _get_executor(self) -> Executor:
+        """Create the underlying executor on first use"""
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    # Spawn keeps workers independent of the server's threads and event loop
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self.initializer
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="crew-worker",
+                        initializer=self.initializer
+                    )
+                print(f"✅ Crew worker pool started ({self.mode}, {self.max_workers} workers)")
+            return self._executor
+    
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Submit a job to the pool"""
+        future = self._get_executor().submit(fn, *args, **kwargs)
+        with self._lock:
+            self._active += 1
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a job in the pool and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result()
+    
+    def warm_up(self, fn: Callable[[], Any]) -> List[Any]:
+        """Start the workers now, running fn once per submitted job, so the first crews don't wait
+        
+        Warm-up jobs are not counted in the job counters.
+        """
+        executor = self._get_executor()
+        try:
+            futures = [executor.submit(fn) for _ in range(self.max_workers)]
+            return [future.result() for future in futures]
+        except BrokenExecutor:
+            # A worker failed to start; let the next job try a fresh pool
+            self._reset()
+            raise
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get worker pool status"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "started": self._executor is not None,
+                "active_jobs": self._active,
+                "completed_jobs": self._completed,
+                "failed_jobs": self._failed
+            }
+    
+    def shutdown(self, wait: bool = False):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+    
+    def _on_done(self, future: Future):
+        """Update counters when a job finishes"""
+        with self._lock:
+            self._active -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+        
+        if not future.cancelled() and isinstance(future.exception(), BrokenExecutor):
+            # A worker died (e.g. out of memory) or failed to start; replace the pool for later jobs
+            print("⚠️ Crew worker pool broken, restarting")
+            self._reset()
+    
+    def _reset(self):
+        """Discard a broken executor so the next job starts a fresh one"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Global crew worker pool instance
+crew_pool = CrewWorkerPool(initializer=load_agents)